@@ -1,5 +1,10 @@
-from .gui_ttk import ImageResizerGUI
-
 __all__ = [
     "ImageResizerGUI"
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    # Imported on first use so headless adapters (the CLI) never pull in Tk.
+    if name == "ImageResizerGUI":
+        from .gui_ttk import ImageResizerGUI
+        return ImageResizerGUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from itertools import chain
+from typing import Iterator, List, Optional
+
+from ..core.archive import is_archive, iter_archive
+from ..core.encoders import ENCODER_PROFILES
+from ..core.models import ResizeOptions
+from ..core.io_utils import SUPPORTED_EXTS, iter_images
+from ..core.naming import NAMING_STRATEGIES
+from ..core.parallel import EXECUTOR_KINDS
+from ..core.resize_service import RESAMPLERS, resize_many, resume
+from ..core.watch import watch
+from ..core.crop import FIT_MODES
+from ..core.dedup import DEDUP_MODES
+from ..core.prefetch import Prefetcher
+from ..core.workqueue import WorkQueue, run_local, run_worker
+from ..core.writer import FSYNC_POLICIES
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="image_resizer_gui",
+                                description="Batch-resize images without the GUI. Writes one JSON result per line to stdout.")
+    p.add_argument("inputs", nargs="*", help="image files, folders (scanned recursively) and/or ZIP/TAR archives")
+    p.add_argument("-i", "--input-list", metavar="FILE", help="read input paths, one per line, from FILE ('-' for stdin)")
+    p.add_argument("-o", "--out-dir", help="output folder, or a .zip/.tar/.tar.gz file to write into")
+    p.add_argument("--include", action="append", metavar="GLOB", help="only take folder entries matching GLOB (repeatable)")
+    p.add_argument("--exclude", action="append", metavar="GLOB", help="skip folder entries matching GLOB (repeatable)")
+
+    o = p.add_argument_group("resize options")
+    o.add_argument("--mode", choices=["percent", "dimensions"], default="percent")
+    o.add_argument("--percent", type=float, default=50.0)
+    o.add_argument("--width", dest="width_px", type=int)
+    o.add_argument("--height", dest="height_px", type=int)
+    o.add_argument("--no-keep-aspect", dest="keep_aspect", action="store_false")
+    o.add_argument("--fit", choices=FIT_MODES, default="scale",
+                   help="with --width and --height: cover (crop), contain (pad) or smart (crop to the detail)")
+    o.add_argument("--format", dest="format_choice", choices=["keep", "jpg", "png", "webp"], default="keep")
+    o.add_argument("--no-suffix", dest="append_suffix", action="store_false", help="do not append '_resized'")
+    o.add_argument("--quality", dest="jpg_quality", type=int, default=85, help="JPEG quality (default 85)")
+    o.add_argument("--no-fast-decode", dest="fast_decode", action="store_false", help="always decode at full resolution")
+    o.add_argument("--naming", choices=NAMING_STRATEGIES, default="counter")
+    o.add_argument("--profile", dest="encoder_profile", choices=list(ENCODER_PROFILES), default="balanced",
+                   help="encoder speed/size trade-off")
+    o.add_argument("--target-kb", type=float, help="JPEG/WEBP: search the highest quality that fits this size")
+    o.add_argument("--resampler", choices=RESAMPLERS, default="pillow",
+                   help="numpy stacks same-size images per chunk (needs NumPy)")
+    o.add_argument("--no-auto-orient", dest="auto_orient", action="store_false", help="ignore EXIF orientation")
+    o.add_argument("--keep-exif", action="store_true", help="copy EXIF/XMP to the outputs (orientation reset to 1)")
+    o.add_argument("--no-icc", dest="keep_icc", action="store_false", help="drop embedded ICC profiles")
+    o.add_argument("--srgb", dest="color", action="store_const", const="srgb", default="keep",
+                   help="convert images with an embedded ICC profile (Adobe RGB, CMYK, ...) to sRGB")
+    o.add_argument("--background", default="#ffffff", metavar="COLOR",
+                   help="colour transparency is flattened onto for JPEG outputs (default #ffffff)")
+    o.add_argument("--lossless", action="store_true",
+                   help="copy the JPEG data of same-size JPEG outputs instead of re-encoding them (ignores --quality/--profile)")
+
+    e = p.add_argument_group("execution")
+    e.add_argument("-j", "--workers", type=int, default=0, help="worker count, 0 = one per CPU (default)")
+    e.add_argument("--executor", choices=EXECUTOR_KINDS, default="process")
+    e.add_argument("--unordered", action="store_true", help="emit results as they finish instead of in input order")
+    e.add_argument("--incremental", action="store_true", help="skip outputs that are up to date with the manifest")
+    e.add_argument("--memory-budget", type=float, metavar="MB", help="cap the estimated decode memory in flight")
+    e.add_argument("--chunk-size", type=int, default=16, help="files per worker task with --resampler numpy")
+    e.add_argument("--io-threads", type=int, default=4, help="threads writing outputs, 0 = write in the workers")
+    e.add_argument("--fsync", choices=FSYNC_POLICIES, default="never", help="durability: per file or once per batch")
+    e.add_argument("--prefetch", type=float, metavar="MB",
+                   help="read upcoming inputs into memory ahead of decoding (network/slow storage)")
+    e.add_argument("--dedup", choices=DEDUP_MODES,
+                   help="resize identical inputs once; link (or copy) the output for the duplicates")
+    e.add_argument("--journal", action="store_true",
+                   help="record the batch in the output folder so an interrupted run can be continued with --resume")
+    e.add_argument("--resume", action="store_true",
+                   help="continue the journaled batch in -o where it stopped (no inputs; its options are reused)")
+    e.add_argument("--queue", metavar="FILE",
+                   help="queue the batch in FILE (sqlite) in chunks and work it with --processes local processes; "
+                        "other machines sharing the filesystem can help with --join FILE")
+    e.add_argument("--processes", type=int, default=0, help="--queue: local worker processes, 0 = one per CPU")
+    e.add_argument("--join", metavar="FILE", help="work on the queue in FILE until it is done (no inputs, no -o)")
+    e.add_argument("--watch", action="store_true",
+                   help="keep running: resize new/changed images in the (single) input folder as they settle")
+    e.add_argument("--interval", type=float, default=2.0, help="--watch poll interval in seconds (default 2)")
+    e.add_argument("--settle", type=float, default=2.0,
+                   help="--watch: seconds a file's size/mtime must stay unchanged before it is taken (default 2)")
+    e.add_argument("--full-rescan", type=float, metavar="SECS",
+                   help="--watch: re-check every file this often, to catch images rewritten in place (default never)")
+    e.add_argument("-q", "--quiet", action="store_true", help="no progress/errors on stderr")
+    return p
+
+def _read_list(path: str) -> Iterator[str]:
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line: yield line
+    finally:
+        if f is not sys.stdin: f.close()
+
+def _expand(paths, include, exclude, out_dir: Optional[str]=None) -> Iterator[str]:
+    # folders are scanned lazily, while outputs are being written: never into out_dir
+    for p in paths:
+        if os.path.isdir(p): yield from iter_images(p, include, exclude, skip_dirs=[out_dir] if out_dir else None)
+        elif is_archive(p) and os.path.isfile(p): yield from iter_archive(p, include, exclude)
+        elif os.path.splitext(p)[1].lower() in SUPPORTED_EXTS: yield p
+
+def main(argv: Optional[List[str]]=None) -> int:
+    args = build_parser().parse_args(argv)
+    log = None if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    if args.join:
+        if args.inputs or args.input_list or args.out_dir: build_parser().error("--join takes no inputs and no -o")
+        n = run_worker(args.join, log=log, workers=args.workers or 1, executor=args.executor,
+                       io_threads=args.io_threads, fsync=args.fsync, dedup=args.dedup)
+        if log: log(f"{n} images done here")
+        return 0
+    if not args.out_dir: build_parser().error("-o/--out-dir is required")
+    if args.resume and (args.inputs or args.input_list or args.watch):
+        build_parser().error("--resume takes no inputs: they come from the journal in -o")
+    if not args.inputs and not args.input_list and not args.resume:
+        build_parser().error("no inputs given (pass paths or --input-list)")
+    opts = ResizeOptions(mode=args.mode, percent=args.percent, width_px=args.width_px, height_px=args.height_px,
+                         keep_aspect=args.keep_aspect, fit=args.fit, format_choice=args.format_choice,
+                         append_suffix=args.append_suffix, jpg_quality=args.jpg_quality,
+                         fast_decode=args.fast_decode, naming=args.naming, encoder_profile=args.encoder_profile,
+                         target_bytes=int(args.target_kb * 1024) if args.target_kb else None,
+                         resampler=args.resampler, auto_orient=args.auto_orient, keep_icc=args.keep_icc,
+                         keep_exif=args.keep_exif, lossless=args.lossless, color=args.color,
+                         background=args.background)
+    if args.watch:
+        if args.input_list or len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+            build_parser().error("--watch takes exactly one input folder")
+        if os.path.abspath(args.out_dir) == os.path.abspath(args.inputs[0]):
+            build_parser().error("--watch needs an output folder other than the watched one (a subfolder is fine)")
+        return _watch(args, opts, log)
+    paths = chain(args.inputs, _read_list(args.input_list) if args.input_list else ())
+    if args.queue: return _queue(args, _expand(paths, args.include, args.exclude, args.out_dir), opts, log)
+
+    t0 = time.perf_counter(); n = failed = 0
+    prefetch = Prefetcher(int(args.prefetch * 2**20)) if args.prefetch else None
+    kw = dict(log=log, workers=args.workers, executor=args.executor, ordered=not args.unordered,
+              incremental=args.incremental, chunk_size=args.chunk_size,
+              io_threads=args.io_threads, fsync=args.fsync, dedup=args.dedup, prefetch=prefetch,
+              memory_budget=int(args.memory_budget * 2**20) if args.memory_budget else None)
+    if args.resume: results = resume(args.out_dir, **kw)
+    else: results = resize_many(_expand(paths, args.include, args.exclude, args.out_dir), args.out_dir, opts, journal=args.journal, **kw)
+    for res in results:
+        n += 1; failed += not res.ok
+        sys.stdout.write(json.dumps(asdict(res)) + "\n")
+    if log: log(f"{n} images, {failed} errors in {time.perf_counter()-t0:.2f}s")
+    if log and prefetch:
+        st = prefetch.stats()
+        log(f"Prefetch: {st['hit_rate']:.0%} ready in time, {st['stall_s']:.2f}s waiting on reads")
+    return 1 if failed else 0
+
+def _queue(args, inputs, opts: ResizeOptions, log) -> int:
+    t0 = time.perf_counter()
+    try: q = WorkQueue.create(args.queue, inputs, opts, args.out_dir)
+    except ValueError as e: build_parser().error(str(e))
+    try:
+        # one resize worker per process unless -j says otherwise: the processes are the parallelism
+        report = run_local(args.queue, args.processes, log=log, workers=args.workers or 1, executor=args.executor,
+                           incremental=args.incremental, io_threads=args.io_threads, fsync=args.fsync, dedup=args.dedup)
+        for res in q.results(): sys.stdout.write(json.dumps(asdict(res)) + "\n")
+    finally: q.close()
+    files = report["files"]; failed = files.get("error", 0) + files.get("pending", 0)
+    if log: log(f"{sum(files.values())} images, {failed} errors in {time.perf_counter()-t0:.2f}s "
+                f"({report['retried_chunks']} chunks retried)")
+    return 1 if failed else 0
+
+def _watch(args, opts: ResizeOptions, log) -> int:
+    def emit(res):
+        sys.stdout.write(json.dumps(asdict(res)) + "\n"); sys.stdout.flush()
+    if log: log(f"Watching {args.inputs[0]} (Ctrl+C to stop)")
+    try:
+        watch(args.inputs[0], args.out_dir, opts, interval=args.interval, settle=args.settle,
+              full_rescan=args.full_rescan, include=args.include, exclude=args.exclude, workers=args.workers, executor=args.executor,
+              log=log, on_result=emit, ordered=not args.unordered, chunk_size=args.chunk_size,
+              io_threads=args.io_threads, fsync=args.fsync, dedup=args.dedup,
+              prefetch=Prefetcher(int(args.prefetch * 2**20)) if args.prefetch else None,
+              memory_budget=int(args.memory_budget * 2**20) if args.memory_budget else None)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
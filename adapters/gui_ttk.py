@@ -1,14 +1,86 @@
+import contextlib
 import os
+import queue
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
-from typing import List, Optional
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Tuple
 
+from ..core.cache import DecodedCache
+from ..core.crop import FIT_MODES
+from ..core.encoders import ENCODER_PROFILES
 from ..core.models import ResizeResult, ResizeOptions
-from ..core.io_utils import list_images
-from ..core.resize_service import calc_target_size, resize_many
+from ..core.io_utils import iter_images, count_images
+from ..core.probe import probe_many, estimate_output_bytes
+from ..core.resize_service import calc_target_size, resize_many, warm_cache
 
 SUPPORTED_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tiff"}
+MAX_LOG_LINES = 500
+MAX_PREVIEW_LINES = 2000
+DECODE_CACHE_BYTES = 256 << 20  # decoded pixels kept between preview and run
+
+class WorkerBridge:
+    """
+    Hands events from a background batch to the Tk mainloop. Worker threads only touch the
+    queue and the pause/cancel events; the UI drains the queue on a timer, keeping the last
+    progress value only and at most max_log lines of pending log, so a fast batch cannot
+    flood the widgets.
+    """
+    def __init__(self, root: tk.Misc, on_progress: Callable[[int, int, float, Optional[float]], None],
+                 on_log: Callable[[List[str]], None], on_done: Callable[..., None],
+                 interval_ms: int=100, max_log: Optional[int]=MAX_LOG_LINES):
+        self.root = root; self.interval_ms = interval_ms
+        self.on_progress, self.on_log, self.on_done = on_progress, on_log, on_done
+        self._q: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._logs: deque = deque(maxlen=max_log)
+        self._cancel = threading.Event(); self._running = threading.Event(); self._running.set()
+        self._t0 = time.monotonic(); self._paused_for = 0.0; self._paused_at: Optional[float] = None
+
+    # -- worker side --
+    def progress(self, done: int, total: int): self._q.put(("progress", done, total))
+    def log(self, msg: str): self._q.put(("log", msg))
+    def done(self, *summary): self._q.put(("done",) + summary)
+
+    @property
+    def cancelled(self) -> bool: return self._cancel.is_set()
+
+    def checkpoint(self) -> bool:
+        """Block while paused; False once cancelled."""
+        self._running.wait()
+        return not self._cancel.is_set()
+
+    # -- UI side --
+    def start(self):
+        self._t0 = time.monotonic(); self.root.after(self.interval_ms, self._drain)
+
+    def cancel(self):
+        self._cancel.set(); self._running.set()
+
+    def toggle_pause(self) -> bool:
+        """Pause or resume; returns True when now paused."""
+        if self._running.is_set():
+            self._running.clear(); self._paused_at = time.monotonic(); return True
+        self._paused_for += time.monotonic() - (self._paused_at or time.monotonic())
+        self._paused_at = None; self._running.set(); return False
+
+    def _drain(self):
+        last = None; done = None
+        while True:
+            try: ev = self._q.get_nowait()
+            except queue.Empty: break
+            if ev[0] == "progress": last = ev[1:]
+            elif ev[0] == "log": self._logs.append(ev[1])
+            else: done = ev[1:]
+        if self._logs: self.on_log(list(self._logs)); self._logs.clear()
+        if last:
+            n, total = last
+            busy = max(1e-6, time.monotonic() - self._t0 - self._paused_for - (time.monotonic() - self._paused_at if self._paused_at else 0))
+            rate = n / busy
+            self.on_progress(n, total, rate, (total - n) / rate if rate and total >= n else None)
+        if done is not None: self.on_done(*done)
+        else: self.root.after(self.interval_ms, self._drain)
 
 class ImageResizerGUI:
     def __init__(self, root: tk.Tk):
@@ -26,12 +98,17 @@ class ImageResizerGUI:
         self.width_val = tk.IntVar(value=0)
         self.height_val = tk.IntVar(value=0)
         self.keep_aspect = tk.BooleanVar(value=True)
+        self.fit = tk.StringVar(value="scale")  # scale | cover | contain | smart
 
         self.format_choice = tk.StringVar(value="keep")  # keep | jpg | png | webp
         self.jpg_quality = tk.IntVar(value=85)
         self.append_suffix = tk.BooleanVar(value=True)
+        self.encoder_profile = tk.StringVar(value="balanced")
+        self.lossless = tk.BooleanVar(value=False)
 
         self.status = tk.StringVar(value="Select files or a folder to begin")
+        self.bridge: Optional[WorkerBridge] = None
+        self.decoded = DecodedCache(DECODE_CACHE_BYTES)
         self._build_ui()
 
     # ---------- UI ----------
@@ -58,6 +135,9 @@ class ImageResizerGUI:
         tk.Label(row, text="Height:").pack(side="left")
         self.height_entry = tk.Entry(row, textvariable=self.height_val, width=6); self.height_entry.pack(side="left", padx=(4,10))
         self.keep_chk = tk.Checkbutton(row, text="Keep aspect ratio", variable=self.keep_aspect); self.keep_chk.pack(side="left", padx=(10,0))
+        tk.Label(row, text="Fit:").pack(side="left", padx=(10,0))
+        self.fit_cb = ttk.Combobox(row, textvariable=self.fit, values=list(FIT_MODES), state="readonly", width=8)
+        self.fit_cb.pack(side="left", padx=(4,0))
 
         fmt = tk.LabelFrame(self.root, text="Format & Naming"); fmt.pack(fill="x", padx=10, pady=6)
         fr1 = tk.Frame(fmt); fr1.pack(fill="x", pady=4)
@@ -73,10 +153,16 @@ class ImageResizerGUI:
         fr2 = tk.Frame(fmt); fr2.pack(fill="x", pady=2)
         self.append_chk = tk.Checkbutton(fr2, text="Append '_resized' to filenames (recommended)", variable=self.append_suffix)
         self.append_chk.pack(side="left")
+        tk.Label(fr2, text="Encoder:").pack(side="left", padx=(20,0))
+        ttk.Combobox(fr2, textvariable=self.encoder_profile, values=list(ENCODER_PROFILES), state="readonly", width=9).pack(side="left", padx=(6,0))
+        tk.Checkbutton(fr2, text="Copy JPEGs kept at 100% (lossless)", variable=self.lossless).pack(side="left", padx=(20,0))
 
         actions = tk.Frame(self.root); actions.pack(fill="x", padx=10, pady=(4,6))
         tk.Button(actions, text="Preview", command=self.preview).pack(side="left")
-        tk.Button(actions, text="Resize Images", command=self.run).pack(side="left", padx=8)
+        self.run_btn = tk.Button(actions, text="Resize Images", command=self.run); self.run_btn.pack(side="left", padx=8)
+        self.pause_btn = tk.Button(actions, text="Pause", command=self.toggle_pause, state="disabled"); self.pause_btn.pack(side="left")
+        self.cancel_btn = tk.Button(actions, text="Cancel", command=self.cancel, state="disabled"); self.cancel_btn.pack(side="left", padx=8)
+        self.rate_label = tk.Label(actions, text="", anchor="e"); self.rate_label.pack(side="right")
 
         self.progress = ttk.Progressbar(self.root, mode="determinate"); self.progress.pack(fill="x", padx=10, pady=(2,4))
         tk.Label(self.root, textvariable=self.status, anchor="w").pack(fill="x", padx=10)
@@ -89,6 +175,7 @@ class ImageResizerGUI:
         self.percent_entry.configure(state="normal" if is_pct else "disabled")
         self.width_entry.configure(state="disabled" if is_pct else "normal")
         self.height_entry.configure(state="disabled" if is_pct else "normal")
+        self.fit_cb.configure(state="disabled" if is_pct else "readonly")
 
     def _toggle_quality_enabled(self):
         # (Keep slider enabled; only matters for JPEG output)
@@ -112,7 +199,7 @@ class ImageResizerGUI:
         folder = filedialog.askdirectory(title="Select folder containing images")
         if folder:
             self.folder = folder; self.files = []
-            count = len([p for p in list_images(folder)])
+            count = count_images(folder)
             self.input_label.config(text=f"Folder selected ({count} images)")
 
     def choose_output(self):
@@ -123,44 +210,78 @@ class ImageResizerGUI:
 
     # ---------- actions ----------
     def preview(self):
-        files = self._gather_inputs()
-        if not files:
+        if self.bridge: return
+        inputs, count = self._gather_inputs()
+        if not count:
             messagebox.showwarning("No images", "Please select files or a folder with images")
             return
 
         self.preview_box.delete("1.0", tk.END)
-        self.preview_box.insert(tk.END, f"Selected {len(files)} images.\n\nTarget sizes (first 10):\n")
-
-        mode = self.mode.get()
-        pct = _safe_float(self.percent_val.get(), default=50.0)
-        w = _safe_int(self.width_val.get())
-        h = _safe_int(self.height_val.get())
-        keep = self.keep_aspect.get()
-
-        for fp in files[:10]:
-            try:
-                from PIL import Image  # safe import here for preview metadata only
-                with Image.open(fp) as im:
-                    sw, sh = im.size
-                tw, th = calc_target_size(sw, sh, ResizeOptions(mode=mode, percent=pct, width_px=w, height_px=h, keep_aspect=keep))
-                self.preview_box.insert(tk.END, f"- {os.path.basename(fp)} ({sw}x{sh}) -> ({tw}x{th})\n")
-            except Exception as e:
-                self.preview_box.insert(tk.END, f"- {os.path.basename(fp)} [error: {e}]\n")
-
+        self.preview_box.insert(tk.END, f"Selected {count} images.\n\nTarget sizes (first {MAX_PREVIEW_LINES}):\n")
+        opts = ResizeOptions(mode=self.mode.get(), percent=_safe_float(self.percent_val.get(), default=50.0),
+                             width_px=_safe_int(self.width_val.get()), height_px=_safe_int(self.height_val.get()),
+                             keep_aspect=self.keep_aspect.get(), fit=self.fit.get(), format_choice=self.format_choice.get(),
+                             jpg_quality=int(self.jpg_quality.get()), lossless=self.lossless.get())
+
+        self.progress.configure(value=0, maximum=count)
+        self.bridge = WorkerBridge(self.root, self._on_progress, self._on_preview_lines, self._on_preview_done, max_log=None)
+        self.cancel_btn.configure(state="normal"); self.status.set("Reading image headers...")
+        t = threading.Thread(target=self._preview_worker, args=(self.bridge, inputs, count, opts, self.decoded), daemon=True)
+        t.start(); self.bridge.start()
+
+    @staticmethod
+    def _preview_worker(bridge: WorkerBridge, files: Iterable[str], count: int, opts: ResizeOptions,
+                        cache: Optional[DecodedCache]=None):
+        # Header-only probes on a thread pool; per-file lines are capped, totals cover everything.
+        # Afterwards the first images are decoded into the cache so the run can skip that step.
+        n = errors = 0; in_bytes = out_bytes = 0; readable: List[str] = []
+        for info in probe_many(files):
+            n += 1
+            if info.ok:
+                if cache is not None: readable.append(info.path)
+                sw, sh = info.oriented_size if opts.auto_orient else info.size
+                tw, th = calc_target_size(sw, sh, opts)
+                est = estimate_output_bytes(info, (tw, th), opts) or 0
+                in_bytes += info.file_bytes; out_bytes += est
+                if n <= MAX_PREVIEW_LINES:
+                    bridge.log(f"- {os.path.basename(info.path)} ({sw}x{sh}) -> ({tw}x{th}) ~{_fmt_bytes(est)}")
+            else:
+                errors += 1
+                if n <= MAX_PREVIEW_LINES: bridge.log(f"- {os.path.basename(info.path)} [error: {info.error}]")
+            if n % 64 == 0: bridge.progress(n, count)
+            if bridge.cancelled: break
+        bridge.progress(n, count)
+        if cache is not None and readable and not bridge.cancelled:
+            warmed = warm_cache(readable, opts, cache, stop=lambda: bridge.cancelled)
+            if warmed: bridge.log(f"(decoded {warmed} images ahead of the run, {_fmt_bytes(cache.bytes)} cached)")
+        bridge.done(n, errors, in_bytes, out_bytes, bridge.cancelled)
+
+    def _on_preview_lines(self, lines: List[str]):
+        self.preview_box.insert(tk.END, "\n".join(lines) + "\n")
+
+    def _on_preview_done(self, n: int, errors: int, in_bytes: int, out_bytes: int, cancelled: bool):
+        self.bridge = None; self.cancel_btn.configure(state="disabled")
+        self.preview_box.insert(tk.END, f"\n{'Cancelled after' if cancelled else 'Total:'} {n} images, {errors} unreadable. "
+                                        f"Input {_fmt_bytes(in_bytes)} -> estimated output {_fmt_bytes(out_bytes)}\n")
+        self.preview_box.see(tk.END)
         self.status.set("Preview generated. Ready to resize.")
 
     def run(self):
-        files = self._gather_inputs()
-        if not files:
+        inputs, count = self._gather_inputs()
+        if not count:
             messagebox.showwarning("No images", "Please select files or a folder with images")
             return
 
         # default output = '<source>/output'
         out = self.output_folder
         if not out:
-            base_root = os.path.dirname(files[0]) if self.files else (self.folder or os.getcwd())
+            base_root = os.path.dirname(self.files[0]) if self.files else (self.folder or os.getcwd())
             out = os.path.join(base_root, "output")
         os.makedirs(out, exist_ok=True)
+        if self.folder and not self.files:
+            # the scan is lazy, so keep it from discovering outputs written inside the folder
+            # (resize_many itself skips the ones it wrote when out is the folder)
+            inputs = iter_images(self.folder, skip_dirs=[out])
 
         opts = ResizeOptions(
             mode=self.mode.get(),
@@ -168,44 +289,84 @@ class ImageResizerGUI:
             width_px=_safe_int(self.width_val.get()),
             height_px=_safe_int(self.height_val.get()),
             keep_aspect=self.keep_aspect.get(),
+            fit=self.fit.get(),
             format_choice=self.format_choice.get(),
             append_suffix=self.append_suffix.get(),
             jpg_quality=int(self.jpg_quality.get()),
+            encoder_profile=self.encoder_profile.get(),
+            lossless=self.lossless.get(),
         )
 
-        self.progress.configure(value=0, maximum=len(files))
-        t = threading.Thread(target=self._worker, args=(files, out, opts), daemon=True)
-        t.start()
-
-    def _worker(self, files: List[str], out: str, opts: ResizeOptions):
+        if self.bridge: return  # a batch is already running
+        self.progress.configure(value=0, maximum=count)
+        self.bridge = WorkerBridge(self.root, self._on_progress, self._on_log, self._on_done)
+        self.run_btn.configure(state="disabled"); self.pause_btn.configure(state="normal", text="Pause")
+        self.cancel_btn.configure(state="normal"); self.status.set("Resizing...")
+        # the folder is re-scanned lazily by the worker, so resizing starts with discovery
+        t = threading.Thread(target=self._worker, args=(self.bridge, inputs, count, out, opts, self.decoded), daemon=True)
+        t.start(); self.bridge.start()
+
+    def toggle_pause(self):
+        if self.bridge:
+            paused = self.bridge.toggle_pause()
+            self.pause_btn.configure(text="Resume" if paused else "Pause")
+            self.status.set("Paused (images already started will finish)" if paused else "Resizing...")
+
+    def cancel(self):
+        if self.bridge: self.bridge.cancel(); self.status.set("Cancelling...")
+
+    @staticmethod
+    def _worker(bridge: WorkerBridge, files: Iterable[str], count: int, out: str, opts: ResizeOptions,
+                cache: Optional[DecodedCache]=None):
+        # Runs off the UI thread: talk to Tk only through the bridge.
         ok = err = 0
-
-        def on_progress(done: int, total: int):
-            self.progress.configure(value=done)
-            self.root.update_idletasks()
-
-        def on_log(msg: str):
-            self._append(msg)
-
-        for res in resize_many(files, out, opts, progress=on_progress, log=on_log):
-            if isinstance(res, ResizeResult) and res.ok:
-                ok += 1
-            else:
-                err += 1
-
-        self.status.set(f"Done. Success: {ok}, Errors: {err}. Output: {out}")
-        self._append(f"\nFinished.\nSuccess: {ok}\nErrors: {err}\nOutput: {out}")
+        try:
+            results = resize_many(files, out, opts, progress=bridge.progress, log=bridge.log, total=count,
+                                  workers=0, executor="thread", cache=cache)
+            with contextlib.closing(results):  # cancelling closes the batch now, releasing its unwritten names
+                for res in results:
+                    if isinstance(res, ResizeResult) and res.ok:
+                        ok += 1
+                    else:
+                        err += 1
+                    if not bridge.checkpoint(): break
+        except Exception as e:
+            bridge.log(f"[Error] batch aborted -> {e}")
+        if cache is not None and cache.hits:
+            st = cache.stats(); bridge.log(f"Decode cache: {st['hits']} hits, {st['misses']} misses")
+        bridge.done(ok, err, out, bridge.cancelled)
+
+    def _on_progress(self, done: int, total: int, rate: float, eta: Optional[float]):
+        if done > total: self.progress.configure(maximum=done)
+        self.progress.configure(value=done)
+        self.rate_label.config(text=f"{rate:.1f} img/s" + (f" | ETA {_fmt_secs(eta)}" if eta is not None else ""))
+
+    def _on_log(self, lines: List[str]):
+        self._append("\n".join(lines))
+
+    def _on_done(self, ok: int, err: int, out: str, cancelled: bool):
+        self.bridge = None
+        self.run_btn.configure(state="normal"); self.pause_btn.configure(state="disabled", text="Pause")
+        self.cancel_btn.configure(state="disabled")
+        head = "Cancelled" if cancelled else "Done"
+        self.status.set(f"{head}. Success: {ok}, Errors: {err}. Output: {out}")
+        self._append(f"\n{head}.\nSuccess: {ok}\nErrors: {err}\nOutput: {out}")
 
     # ---------- helpers ----------
-    def _gather_inputs(self) -> List[str]:
+    def _gather_inputs(self) -> Tuple[Iterable[str], int]:
+        """Return the inputs (lazy for folders) and their (possibly cached) count."""
         if self.files:
-            return [f for f in self.files if os.path.splitext(f)[1].lower() in SUPPORTED_EXTS]
+            files = [f for f in self.files if os.path.splitext(f)[1].lower() in SUPPORTED_EXTS]
+            return files, len(files)
         if self.folder:
-            return list(list_images(self.folder))
-        return []
+            return iter_images(self.folder), count_images(self.folder)
+        return [], 0
 
     def _append(self, text: str):
-        self.preview_box.insert(tk.END, text + "\n"); self.preview_box.see(tk.END)
+        self.preview_box.insert(tk.END, text + "\n")
+        excess = int(self.preview_box.index("end-1c").split(".")[0]) - MAX_LOG_LINES
+        if excess > 0: self.preview_box.delete("1.0", f"{excess + 1}.0")
+        self.preview_box.see(tk.END)
 
 
 def _safe_int(v):
@@ -214,6 +375,15 @@ def _safe_int(v):
     except Exception:
         return None
 
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB": return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+def _fmt_secs(s: float) -> str:
+    m, s = divmod(int(s), 60); h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
 def _safe_float(v, default):
     try:
         return float(str(v).strip())
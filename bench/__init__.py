@@ -0,0 +1,10 @@
+from .corpus import make_corpus
+from .runner import BenchCase, DEFAULT_MATRIX, run_matrix, compare
+
+__all__ = [
+    "make_corpus",
+    "BenchCase",
+    "DEFAULT_MATRIX",
+    "run_matrix",
+    "compare"
+]
@@ -0,0 +1,62 @@
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+
+from .corpus import DEFAULT_SIZES, make_corpus
+from ..core.batch_resample import HAVE_NUMPY
+from ..core.models import ResizeOptions
+from .runner import DEFAULT_MATRIX, compare, compare_resamplers, load, run_matrix
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="image_resizer_gui.bench", description="Resize pipeline benchmarks")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="build/reuse a synthetic corpus and run the option matrix")
+    r.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    r.add_argument("--corpus", help="corpus folder to create or reuse (default: temporary)")
+    r.add_argument("--copies", type=int, default=2, help="images per size/mode/format combination")
+    r.add_argument("--sizes", default=",".join(f"{w}x{h}" for w, h in DEFAULT_SIZES),
+                   help="comma-separated WxH source sizes (default %(default)s)")
+    r.add_argument("--case", action="append", help="only run the named case(s)")
+    c = sub.add_parser("compare", help="flag regressions between two result files")
+    c.add_argument("base"); c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown fraction (default 0.10)")
+    q = sub.add_parser("resampler", help="NumPy stack resampler vs Pillow: throughput and PSNR")
+    q.add_argument("--corpus", help="corpus folder to create or reuse (default: temporary)")
+    q.add_argument("--copies", type=int, default=8, help="same-size images per mode (default 8)")
+    q.add_argument("--sizes", default="1920x1080", help="comma-separated WxH source sizes (default %(default)s)")
+    q.add_argument("--percent", type=float, default=25.0, help="target scale (default 25)")
+    args = p.parse_args(argv)
+
+    if args.cmd == "compare":
+        msgs = compare(load(args.base), load(args.new), args.threshold)
+        for m in msgs: print("REGRESSION", m)
+        return 1 if msgs else 0
+
+    if args.cmd == "resampler" and not HAVE_NUMPY:
+        print("NumPy is not installed", file=sys.stderr); return 1
+    sizes = [tuple(int(v) for v in s.lower().split("x")) for s in args.sizes.split(",") if s]
+    corpus = args.corpus or tempfile.mkdtemp(prefix="resize_corpus_")
+    if args.cmd == "resampler":
+        try:
+            paths = make_corpus(corpus, sizes=sizes, modes=("RGB", "RGBA", "L"), formats=("png",), copies=args.copies)
+            print(json.dumps(compare_resamplers(paths, ResizeOptions(mode="percent", percent=args.percent)), indent=2))
+        finally:
+            if not args.corpus: shutil.rmtree(corpus, ignore_errors=True)
+        return 0
+
+    cases = [k for k in DEFAULT_MATRIX if not args.case or k.name in args.case]
+    try:
+        paths = make_corpus(corpus, sizes=sizes, copies=args.copies)
+        res = run_matrix(paths, cases, log=lambda m: print(m, file=sys.stderr))
+    finally:
+        if not args.corpus: shutil.rmtree(corpus, ignore_errors=True)
+    text = json.dumps(res, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(text)
+    else:
+        print(text)
+    return 0
+
+sys.exit(main())
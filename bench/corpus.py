@@ -0,0 +1,49 @@
+import os
+import random
+from typing import List, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter
+
+DEFAULT_SIZES: Sequence[Tuple[int, int]] = ((640, 480), (1920, 1080), (4000, 3000))
+DEFAULT_MODES: Sequence[str] = ("RGB", "RGBA", "P", "L")
+DEFAULT_FORMATS: Sequence[str] = ("jpg", "png", "webp")
+
+def _synthetic(size: Tuple[int, int], rnd: random.Random) -> Image.Image:
+    # Gradient + shapes + light noise: compresses roughly like a photo, unlike flat fills or pure noise.
+    w, h = size
+    im = Image.linear_gradient("L").resize(size).convert("RGB")
+    im = Image.merge("RGB", (im.getchannel(0), im.getchannel(1).transpose(Image.Transpose.FLIP_LEFT_RIGHT),
+                             im.getchannel(2).transpose(Image.Transpose.ROTATE_180)))
+    d = ImageDraw.Draw(im)
+    for _ in range(24):
+        x, y = rnd.randrange(w), rnd.randrange(h); r = rnd.randrange(8, max(9, min(w, h)//4))
+        d.ellipse((x-r, y-r, x+r, y+r), fill=tuple(rnd.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    return Image.blend(im, noise, 0.08).filter(ImageFilter.SMOOTH)
+
+def _to_mode(im: Image.Image, mode: str) -> Image.Image:
+    if mode == "RGBA":
+        out = im.convert("RGBA"); out.putalpha(Image.linear_gradient("L").resize(im.size)); return out
+    if mode == "P": return im.convert("P", palette=Image.Palette.ADAPTIVE, colors=128)
+    return im.convert(mode)
+
+def make_corpus(folder: str, sizes: Sequence[Tuple[int, int]]=DEFAULT_SIZES, modes: Sequence[str]=DEFAULT_MODES,
+                formats: Sequence[str]=DEFAULT_FORMATS, copies: int=2, seed: int=1234) -> List[str]:
+    """
+    Write a deterministic synthetic corpus (no network) covering every size x mode x format
+    combination the format can store; existing files are reused. Returns the file paths.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rnd = random.Random(seed); out: List[str] = []
+    for w, h in sizes:
+        for c in range(copies):
+            base = _synthetic((w, h), rnd)
+            for mode in modes:
+                im = _to_mode(base, mode)
+                for fmt in formats:
+                    if fmt == "jpg" and mode not in ("RGB", "L"): continue
+                    path = os.path.join(folder, f"{w}x{h}_{mode}_{c}.{fmt}")
+                    if not os.path.exists(path):
+                        im.save(path, **({"quality": 90} if fmt in ("jpg", "webp") else {}))
+                    out.append(path)
+    return out
@@ -0,0 +1,163 @@
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Sequence
+
+import PIL
+from PIL import Image
+
+from ..core.batch_resample import HAVE_NUMPY, NUMPY_MODES, resize_batch
+from ..core.metrics import STAGES, BatchStats
+from ..core.models import ResizeOptions
+from ..core.resize_service import _resample, resize_many
+
+@dataclass(frozen=True)
+class BenchCase:
+    name: str
+    opts: ResizeOptions
+    workers: int = 1
+    executor: str = "process"
+
+DEFAULT_MATRIX: Sequence[BenchCase] = (
+    BenchCase("pct50", ResizeOptions(mode="percent", percent=50)),
+    BenchCase("pct50_pool", ResizeOptions(mode="percent", percent=50), workers=0),
+    BenchCase("pct10", ResizeOptions(mode="percent", percent=10)),
+    BenchCase("pct10_full_decode", ResizeOptions(mode="percent", percent=10, fast_decode=False)),
+    BenchCase("w800_webp", ResizeOptions(mode="dimensions", width_px=800, format_choice="webp")),
+    BenchCase("pct50_jpg", ResizeOptions(mode="percent", percent=50, format_choice="jpg")),
+    BenchCase("pct50_numpy", ResizeOptions(mode="percent", percent=50, resampler="numpy")),
+    BenchCase("pct10_numpy", ResizeOptions(mode="percent", percent=10, resampler="numpy")),
+)
+
+def _peak_rss_mb() -> Optional[float]:
+    # A high-water mark for the whole process: only per case when the case ran in a process
+    # of its own (run_matrix's default). On Linux ru_maxrss survives fork+exec, so a spawned
+    # process would report its parent's peak; VmHWM is the process's own.
+    try: import resource
+    except ImportError: return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except (OSError, StopIteration, ValueError): pass
+    kb = max(kb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(kb / (1024*1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_case(case: BenchCase, paths: Sequence[str], scratch: str) -> dict:
+    out_dir = os.path.join(scratch, case.name)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    opts = replace(case.opts, naming="overwrite")
+    in_bytes = sum(os.path.getsize(p) for p in paths)
+    stats = BatchStats()
+    t0 = time.perf_counter()
+    results = list(resize_many(paths, out_dir, opts, workers=case.workers, executor=case.executor, metrics=stats))
+    secs = time.perf_counter() - t0
+    summary = stats.summary()
+    ok = [r for r in results if r.ok]
+    return {
+        "name": case.name, "opts": asdict(case.opts), "workers": case.workers, "executor": case.executor,
+        "images": len(results), "errors": len(results) - len(ok),
+        "in_bytes": in_bytes, "out_bytes": sum(os.path.getsize(r.dst_path) for r in ok),
+        "seconds": round(secs, 4), "images_per_s": round(len(results) / secs, 2),
+        "mb_per_s": round(in_bytes / secs / 1e6, 2),
+        "stages_ms": {k: round(v["total_s"] / v["n"] * 1000, 3) for k, v in summary["stages"].items()},
+        "stage_percentiles": summary["stages"], "by_format": summary["by_format"],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def _run_isolated(case: BenchCase, paths: Sequence[str], scratch: str) -> dict:
+    # a fresh interpreter per case, so peak_rss_mb is that case's own
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as ex:
+        return ex.submit(run_case, case, paths, scratch).result()
+
+def run_matrix(paths: Sequence[str], cases: Sequence[BenchCase]=DEFAULT_MATRIX,
+               scratch: Optional[str]=None, log=None, isolate: bool=True) -> dict:
+    """Run every case (each in its own process unless isolate=False, which leaves peak_rss_mb cumulative)."""
+    own = scratch is None
+    scratch = scratch or tempfile.mkdtemp(prefix="resize_bench_")
+    try:
+        out = []
+        for case in cases:
+            if case.opts.resampler == "numpy" and not HAVE_NUMPY:
+                if log: log(f"{case.name:<20} skipped (NumPy not installed)")
+                continue
+            out.append((_run_isolated if isolate else run_case)(case, paths, scratch))
+            if log: log(f"{case.name:<20} {out[-1]['images_per_s']:>8} img/s {out[-1]['mb_per_s']:>8} MB/s")
+    finally:
+        if own: shutil.rmtree(scratch, ignore_errors=True)
+    return {
+        "meta": {"python": platform.python_version(), "pillow": PIL.__version__, "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "cases": out, "isolated": isolate,
+    }
+
+def _psnr(a, b) -> float:
+    # RGBA is compared premultiplied: colour under (near) zero alpha is not visible and
+    # Pillow only keeps 8 bits of it
+    import numpy as np
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if a.ndim == 3 and a.shape[2] == 4:
+        a[..., :3] *= a[..., 3:] / 255.0; b[..., :3] *= b[..., 3:] / 255.0
+    mse = np.mean((a - b) ** 2)
+    return float("inf") if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+def compare_resamplers(paths: Sequence[str], opts: ResizeOptions, repeat: int=3) -> dict:
+    """
+    Resample the decoded inputs with Pillow and with the NumPy stack engine, grouped by
+    size/mode the way a chunk would be: best-of-repeat throughput for each, and the PSNR
+    (dB) of the NumPy output against Pillow's LANCZOS/BICUBIC.
+    """
+    from ..core.resize_service import calc_target_size
+    groups: Dict[tuple, list] = {}
+    for p in paths:
+        with Image.open(p) as im:
+            if im.mode not in NUMPY_MODES: continue
+            im.load(); groups.setdefault((im.size, im.mode), []).append(im.copy())
+    n = sum(len(g) for g in groups.values())
+    if not n: return {"images": 0}
+    timings = {"pillow": [], "numpy": []}; psnrs: List[float] = []
+    for _ in range(max(1, repeat)):
+        for engine in timings:
+            t0 = time.perf_counter()
+            for (size, _), ims in groups.items():
+                target = calc_target_size(*size, opts)
+                if engine == "numpy": resize_batch(ims, target)
+                else: [_resample(im, *target) for im in ims]
+            timings[engine].append(time.perf_counter() - t0)
+    for (size, _), ims in groups.items():
+        target = calc_target_size(*size, opts)
+        psnrs += [_psnr(a, b) for a, b in zip(resize_batch(ims, target), (_resample(im, *target) for im in ims))]
+    finite = [v for v in psnrs if v != float("inf")] or [float("inf")]
+    return {
+        "images": n, "groups": len(groups),
+        "pillow_images_per_s": round(n / min(timings["pillow"]), 2),
+        "numpy_images_per_s": round(n / min(timings["numpy"]), 2),
+        "psnr_min_db": round(min(finite), 2), "psnr_mean_db": round(sum(finite) / len(finite), 2),
+    }
+
+def compare(base: dict, new: dict, threshold: float=0.10) -> List[str]:
+    """Regressions of new vs base beyond threshold (fractional), matched by case name."""
+    old = {c["name"]: c for c in base["cases"]}; msgs: List[str] = []
+    rss = base.get("isolated") and new.get("isolated")  # cumulative high-water marks say nothing per case
+    for c in new["cases"]:
+        b = old.get(c["name"])
+        if not b: continue
+        if c["images_per_s"] < b["images_per_s"] * (1 - threshold):
+            msgs.append(f"{c['name']}: throughput {b['images_per_s']} -> {c['images_per_s']} img/s")
+        for k in STAGES:
+            was, now = b["stages_ms"].get(k, 0), c["stages_ms"].get(k, 0)
+            if was and now > was * (1 + threshold):
+                msgs.append(f"{c['name']}: {k} {was} -> {now} ms/img")
+        if rss and b.get("peak_rss_mb") and c.get("peak_rss_mb") and c["peak_rss_mb"] > b["peak_rss_mb"] * (1 + threshold):
+            msgs.append(f"{c['name']}: peak RSS {b['peak_rss_mb']} -> {c['peak_rss_mb']} MB")
+    return msgs
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f: return json.load(f)
@@ -1,11 +1,41 @@
-from .models import ResizeOptions, ResizeResult
-from .io_utils import list_images
-from .resize_service import calc_target_size, resize_many
+from .models import ResizeOptions, ResizeResult, Rendition, RenditionResult, ImageInfo
+from .io_utils import list_images, iter_images, count_images
+from .archive import ArchiveMember, iter_archive
+from .metrics import BatchStats
+from .cache import DecodedCache
+from .dedup import find_duplicates
+from .prefetch import Prefetcher
+from .probe import probe, probe_many, estimate_output_bytes
+from .resize_service import calc_target_size, resize_many, resize_renditions, resume, warm_cache
+from .watch import FolderWatcher, watch
+from .workqueue import WorkQueue, run_local, run_worker
 
 __all__ = [
     "ResizeOptions",
     "ResizeResult",
+    "Rendition",
+    "RenditionResult",
+    "ImageInfo",
     "list_images",
+    "iter_images",
+    "count_images",
+    "ArchiveMember",
+    "iter_archive",
     "calc_target_size",
-    "resize_many"
+    "BatchStats",
+    "DecodedCache",
+    "find_duplicates",
+    "Prefetcher",
+    "probe",
+    "probe_many",
+    "estimate_output_bytes",
+    "resize_many",
+    "resize_renditions",
+    "resume",
+    "warm_cache",
+    "FolderWatcher",
+    "watch",
+    "WorkQueue",
+    "run_local",
+    "run_worker"
 ]
\ No newline at end of file
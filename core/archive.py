@@ -0,0 +1,178 @@
+import hashlib
+import io
+import os
+import posixpath
+import secrets
+import tarfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Container, Iterator, Optional, Union
+
+from .io_utils import SUPPORTED_EXTS, Globs, _match, file_digest
+
+ARCHIVE_EXTS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+_TAR_WRITE_MODES = {".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz", ".tar.bz2": "w:bz2", ".tar.xz": "w:xz"}
+
+def archive_ext(path: str) -> Optional[str]:
+    low = path.lower()
+    return next((e for e in sorted(ARCHIVE_EXTS, key=len, reverse=True) if low.endswith(e)), None)
+
+def is_archive(path: str) -> bool:
+    return archive_ext(path) is not None
+
+class ArchiveMember(str):
+    """
+    An image inside a ZIP/TAR, usable wherever resize_many takes a path: the string is
+    "<archive>/<entry>" for names and logs, the attributes say how to read the bytes.
+    offset/size locate members of uncompressed TARs (read directly); data holds the bytes
+    of members of compressed TARs, which can only be read while streaming.
+    """
+    archive: str; entry: str; offset: Optional[int]; size: Optional[int]; data: Optional[bytes]
+
+    def __new__(cls, archive: str, entry: str, offset: Optional[int]=None, size: Optional[int]=None,
+                data: Optional[bytes]=None):
+        self = super().__new__(cls, f"{archive}/{entry}")
+        self.archive, self.entry, self.offset, self.size, self.data = archive, entry, offset, size, data
+        return self
+
+    def __reduce__(self):
+        return ArchiveMember, (self.archive, self.entry, self.offset, self.size, self.data)
+
+def _wanted(entry: str, include: Globs, exclude: Globs) -> bool:
+    name = posixpath.basename(entry)
+    if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTS: return False
+    if exclude and _match(entry, name, exclude): return False
+    return not include or _match(entry, name, include)
+
+def iter_archive(path: str, include: Globs=None, exclude: Globs=None,
+                 entries: Optional[Container[str]]=None) -> Iterator[ArchiveMember]:
+    """
+    Yield the supported images in a ZIP/TAR in archive order, without extracting anything.
+    entries limits the walk to those member names (a compressed TAR reads no other member's data).
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if entries is not None and info.filename not in entries: continue
+                if not info.is_dir() and _wanted(info.filename, include, exclude):
+                    yield ArchiveMember(path, info.filename)
+        return
+    plain = archive_ext(path) == ".tar"
+    with tarfile.open(path, "r:" if plain else "r|*") as tf:
+        for info in tf:
+            if entries is not None and info.name not in entries: continue
+            if not info.isfile() or not _wanted(info.name, include, exclude): continue
+            if plain and not info.sparse:
+                yield ArchiveMember(path, info.name, offset=info.offset_data, size=info.size)
+            else:
+                yield ArchiveMember(path, info.name, data=tf.extractfile(info).read())
+
+# Open ZIPs per process, so members don't re-parse the central directory on every read.
+_ZIPS: "OrderedDict[str, zipfile.ZipFile]" = OrderedDict()
+_ZIPS_MAX = 8
+_ZIPS_LOCK = threading.Lock()
+
+def _forget_zips():
+    # A forked worker would share the parent's file descriptors, seek offsets included:
+    # start with its own handles. The parent's are left open (they are still the parent's).
+    global _ZIPS, _ZIPS_LOCK
+    _ZIPS = OrderedDict(); _ZIPS_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"): os.register_at_fork(after_in_child=_forget_zips)
+
+def _zip(path: str) -> zipfile.ZipFile:
+    with _ZIPS_LOCK:
+        zf = _ZIPS.get(path)
+        if zf is None:
+            zf = _ZIPS[path] = zipfile.ZipFile(path)
+            while len(_ZIPS) > _ZIPS_MAX: _ZIPS.popitem(last=False)[1].close()
+        _ZIPS.move_to_end(path)
+        return zf
+
+def read_member(m: ArchiveMember) -> bytes:
+    if m.data is not None: return m.data
+    if m.offset is not None:
+        with open(m.archive, "rb") as f:
+            f.seek(m.offset); return f.read(m.size)
+    return _zip(m.archive).read(m.entry)
+
+class _Source(io.BytesIO):
+    # error messages ("cannot identify image file ...") should name the source, not the buffer
+    def __init__(self, data: bytes, src: str):
+        super().__init__(data); self._src = str(src)
+
+    def __repr__(self): return repr(self._src)
+
+def _buffered(src: str) -> Optional[bytes]:
+    # bytes already in memory: an archive member's, or a prefetch.Prefetched path's
+    return read_member(src) if isinstance(src, ArchiveMember) else getattr(src, "data", None)
+
+def open_source(src: str) -> Union[str, BinaryIO]:
+    """What to hand Image.open: the path itself, or an in-memory stream for a member."""
+    data = _buffered(src)
+    return src if data is None else _Source(data, src)
+
+def source_digest(src: str) -> str:
+    data = _buffered(src)
+    return file_digest(src) if data is None else hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def read_source(src: str) -> bytes:
+    data = _buffered(src)
+    if data is not None: return data
+    with open(src, "rb") as f: return f.read()
+
+def source_size(src: str) -> int:
+    if getattr(src, "data", None) is not None: return len(src.data)
+    if not isinstance(src, ArchiveMember): return os.path.getsize(src)
+    if src.size is not None: return src.size
+    return _zip(src.archive).getinfo(src.entry).file_size
+
+class ArchiveWriter:
+    """
+    Streams outputs into one ZIP (stored: images are already compressed) or TAR at path,
+    with entry names as allocated. Entries are appended by one background thread in
+    submission order; the archive is built under a temp name and renamed on close(), or
+    deleted by close(discard=True), which is what leaving a with block on an exception
+    (including a batch generator being closed early) does. Same interface as writer.OutputWriter.
+    """
+    threads = 1
+
+    def __init__(self, path: str):
+        self.path = path; ext = archive_ext(path)
+        d = os.path.dirname(path)
+        if d: os.makedirs(d, exist_ok=True)
+        self._tmp = os.path.join(d, f".{os.path.basename(path)}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+        if ext == ".zip": self._zip, self._tar = zipfile.ZipFile(self._tmp, "w", zipfile.ZIP_STORED, allowZip64=True), None
+        else: self._zip, self._tar = None, tarfile.open(self._tmp, _TAR_WRITE_MODES[ext])
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="archive")
+
+    def _add(self, name: str, data: bytes) -> float:
+        t = time.perf_counter()
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, time.localtime()[:6]); info.compress_type = zipfile.ZIP_STORED
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name); info.size = len(data); info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+        return time.perf_counter() - t
+
+    def submit(self, name: str, data: bytes) -> Future:
+        return self._pool.submit(self._add, name, data)
+
+    def written(self, name: str):
+        pass
+
+    def close(self, discard: bool=False):
+        if self._pool is None: return
+        self._pool.shutdown(wait=True, cancel_futures=discard); self._pool = None
+        (self._zip or self._tar).close()
+        if discard:
+            try: os.remove(self._tmp)
+            except OSError: pass
+        else: os.replace(self._tmp, self.path)
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, *exc): self.close(discard=exc_type is not None)
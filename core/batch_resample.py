@@ -0,0 +1,124 @@
+"""
+Optional NumPy resampling engine for batches of same-size images. Separable filter weights
+are built once per (source length, target length, filter), cut into banded blocks, and
+applied to whole stacks of images as a few matrix products per pass, so BLAS does the
+per-pixel work for the batch.
+Output follows Pillow's LANCZOS/BICUBIC definitions but keeps float precision between the
+two passes, so it can differ from Image.resize by a level or so.
+"""
+from functools import lru_cache
+from typing import List, Sequence, Tuple, TYPE_CHECKING
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+HAVE_NUMPY = np is not None
+NUMPY_MODES = ("L", "RGB", "RGBA")
+STACK_BYTES = 256 << 20  # float32 working set per stacked pass
+BLOCK_ROWS = 32  # output rows per banded block; wider blocks multiply more zeros
+
+def _require_numpy():
+    if np is None: raise RuntimeError("The numpy resampler needs NumPy (pip install numpy)")
+
+def _lanczos(x):
+    x = np.abs(x)
+    return np.where(x < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+def _bicubic(x, a=-0.5):
+    x = np.abs(x)
+    return np.where(x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1.0,
+                    np.where(x < 2.0, (((x - 5.0) * x + 8.0) * x - 4.0) * a, 0.0))
+
+_FILTERS = {"lanczos": (_lanczos, 3.0), "bicubic": (_bicubic, 2.0)}
+
+@lru_cache(maxsize=128)
+def filter_matrix(src_len: int, dst_len: int, kind: str="lanczos"):
+    """Dense (dst_len, src_len) float32 weights, computed the way Pillow's resampler does."""
+    _require_numpy()
+    fn, support = _FILTERS[kind]
+    scale = src_len / dst_len
+    fscale = max(scale, 1.0); support *= fscale
+    m = np.zeros((dst_len, src_len), dtype=np.float64)
+    for i in range(dst_len):
+        center = (i + 0.5) * scale
+        lo = max(int(center - support + 0.5), 0); hi = min(int(center + support + 0.5), src_len)
+        w = fn((np.arange(lo, hi) - center + 0.5) / fscale)
+        total = w.sum()
+        m[i, lo:hi] = w / total if total else w
+    m = m.astype(np.float32); m.setflags(write=False)
+    return m
+
+@lru_cache(maxsize=128)
+def filter_blocks(src_len: int, dst_len: int, kind: str="lanczos") -> Tuple:
+    """filter_matrix cut into (out_lo, out_hi, src_lo, src_hi, weights) bands of BLOCK_ROWS rows."""
+    m = filter_matrix(src_len, dst_len, kind)
+    blocks = []
+    for i in range(0, dst_len, BLOCK_ROWS):
+        blk = m[i:i+BLOCK_ROWS]; nz = np.flatnonzero(blk.any(axis=0))
+        lo, hi = int(nz[0]), int(nz[-1]) + 1
+        blocks.append((i, i + len(blk), lo, hi, np.ascontiguousarray(blk[:, lo:hi])))
+    return tuple(blocks)
+
+def _span(blocks) -> float:
+    return sum((b[1]-b[0]) * (b[3]-b[2]) for b in blocks)
+
+def _rows(x, blocks, dst_len):
+    """Filter axis 1 of (N, H, W*C)."""
+    out = np.empty((x.shape[0], dst_len, x.shape[2]), np.float32)
+    for i, j, lo, hi, m in blocks: out[:, i:j] = m @ x[:, lo:hi]
+    return out
+
+def _cols(x, blocks, dst_len):
+    """Filter axis 2 of (N, H, W, C)."""
+    out = np.empty((x.shape[0], x.shape[1], dst_len, x.shape[3]), np.float32)
+    for i, j, lo, hi, m in blocks: out[:, :, i:j] = np.matmul(m, x[:, :, lo:hi])
+    return out
+
+def resample_stack(stack, size: Tuple[int, int], kind: str="lanczos"):
+    """Resample an (N, H, W, C) array to (N, th, tw, C) float32."""
+    _require_numpy()
+    n, h, w, c = stack.shape; tw, th = size
+    by, bx = filter_blocks(h, th, kind), filter_blocks(w, tw, kind)
+    x = stack.astype(np.float32, copy=False)
+    # run whichever pass order multiplies fewer weights
+    if _span(by) * w + _span(bx) * th <= _span(bx) * h + _span(by) * tw:
+        x = _rows(x.reshape(n, h, w*c), by, th).reshape(n, th, w, c)
+        return _cols(x, bx, tw)
+    x = _cols(x, bx, tw).reshape(n, h, tw*c)
+    return _rows(x, by, th).reshape(n, th, tw, c)
+
+def resize_batch(images: Sequence["Image.Image"], size: Tuple[int, int]) -> List["Image.Image"]:
+    """
+    Resize images that share size and mode (L, RGB or RGBA) to size, stacking as many as
+    fit in STACK_BYTES per pass. RGBA is premultiplied like Pillow does.
+    """
+    _require_numpy()
+    from PIL import Image
+    if not images: return []
+    src_size, mode = images[0].size, images[0].mode
+    if mode not in NUMPY_MODES or any(im.size != src_size or im.mode != mode for im in images):
+        raise ValueError("resize_batch needs images of one size and an L/RGB/RGBA mode")
+    sw, sh = src_size; tw, th = size
+    kind = "lanczos" if (tw < sw or th < sh) else "bicubic"
+    bands = len(mode)
+    per = max(sw*sh, tw*sh, sw*th) * bands * 4
+    step = max(1, STACK_BYTES // max(1, per))
+    out: List[Image.Image] = []
+    for i in range(0, len(images), step):
+        group = images[i:i+step]
+        stack = np.empty((len(group), sh, sw, bands), np.float32)
+        for k, im in enumerate(group): stack[k] = np.asarray(im).reshape(sh, sw, bands)
+        if mode == "RGBA": stack[..., :3] *= stack[..., 3:4] / 255.0
+        res = resample_stack(stack, size, kind)
+        if mode == "RGBA":
+            a = res[..., 3:4]
+            res[..., :3] = np.where(a > 0, res[..., :3] * 255.0 / np.maximum(a, 1e-6), 0.0)
+        res = np.clip(np.rint(res), 0, 255).astype(np.uint8)
+        for arr in res:
+            out.append(Image.fromarray(arr[..., 0] if bands == 1 else arr, mode))
+    return out
@@ -0,0 +1,66 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple, TYPE_CHECKING
+
+from .archive import ArchiveMember
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+class DecodedCache:
+    """
+    Size-bounded LRU of decoded images, shared by the threads of one process (the GUI's
+    preview and the run that follows it). Keys start with the file's (path, mtime_ns, size),
+    so an edited file misses; least recently used entries are evicted until the summed
+    pixel bytes fit max_bytes. Cached images are shared: callers must not modify them.
+    """
+    def __init__(self, max_bytes: int=256 << 20):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def file_key(path: str) -> Optional[Tuple[str, int, int]]:
+        if isinstance(path, ArchiveMember): return None  # no stat of its own
+        try: st = os.stat(path)
+        except OSError: return None
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, key: Hashable) -> Optional["Image.Image"]:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None: self.misses += 1; return None
+            self._items.move_to_end(key); self.hits += 1
+            return hit[0]
+
+    def fits(self, nbytes: int) -> bool:
+        return nbytes <= self.max_bytes
+
+    def has_room(self, nbytes: int) -> bool:
+        """Would nbytes more fit without evicting anything?"""
+        with self._lock: return self.bytes + nbytes <= self.max_bytes
+
+    def put(self, key: Hashable, im: "Image.Image", nbytes: int) -> bool:
+        if not self.fits(nbytes): return False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old: self.bytes -= old[1]
+            while self._items and self.bytes + nbytes > self.max_bytes:
+                _, (_, n) = self._items.popitem(last=False); self.bytes -= n; self.evictions += 1
+            self._items[key] = (im, nbytes); self.bytes += nbytes
+        return True
+
+    def clear(self):
+        with self._lock: self._items.clear(); self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            looked = self.hits + self.misses
+            return {"entries": len(self._items), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / looked, 3) if looked else 0.0}
+
+    def __len__(self) -> int:
+        return len(self._items)
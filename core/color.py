@@ -0,0 +1,86 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+COLOR_MODES = ("keep", "srgb")
+_CMS_MODES = {"RGB": "RGB", "RGBA": "RGBA", "CMYK": "RGB"}  # modes ImageCms takes -> mode of the sRGB result
+_NOCACHE = 0x0040  # lcms cmsFLAGS_NOCACHE: one transform is shared by the worker threads
+
+# Transforms built in this process, keyed by (profile digest, mode): a batch shot on one
+# camera builds one. None marks profiles that need no transform (sRGB already) or can't have one.
+_TRANSFORMS: "OrderedDict[Tuple[bytes, str], Any]" = OrderedDict()
+_TRANSFORMS_MAX = 16
+_TRANSFORMS_LOCK = threading.Lock()
+
+def _cms():
+    try:
+        from PIL import ImageCms
+        return ImageCms
+    except ImportError:  # Pillow built without littlecms
+        return None
+
+@lru_cache(maxsize=1)
+def srgb_profile() -> Optional[bytes]:
+    cms = _cms()
+    return cms.ImageCmsProfile(cms.createProfile("sRGB")).tobytes() if cms else None
+
+def _build(icc: bytes, mode: str):
+    cms = _cms()
+    if cms is None: return None
+    try:
+        src = cms.ImageCmsProfile(io.BytesIO(icc))
+        if mode != "CMYK" and cms.getProfileDescription(src).strip().startswith("sRGB"): return None
+        return cms.buildTransform(src, cms.createProfile("sRGB"), mode, _CMS_MODES[mode],
+                                  renderingIntent=0, flags=_NOCACHE)  # 0 = perceptual
+    except (cms.PyCMSError, OSError, ValueError):  # corrupt profile, or one for another colour space
+        return None
+
+def transform(icc: Optional[bytes], mode: str):
+    """The cached transform from profile icc to sRGB for mode, or None when there is nothing to convert."""
+    if not icc or mode not in _CMS_MODES: return None
+    key = (hashlib.blake2b(icc, digest_size=16).digest(), mode)
+    with _TRANSFORMS_LOCK:
+        if key in _TRANSFORMS:
+            _TRANSFORMS.move_to_end(key); return _TRANSFORMS[key]
+    t = _build(icc, mode)
+    with _TRANSFORMS_LOCK:
+        _TRANSFORMS[key] = t
+        while len(_TRANSFORMS) > _TRANSFORMS_MAX: _TRANSFORMS.popitem(last=False)
+    return t
+
+def flatten(im: "Image.Image", background: str="#ffffff") -> "Image.Image":
+    """Composite transparent pixels onto background in one pass; images without alpha come back as they are."""
+    if im.mode == "P" and "transparency" in im.info or im.mode in ("PA", "LA", "La", "RGBa"):
+        im = im.convert("RGBA")
+    if im.mode != "RGBA": return im
+    from PIL import Image, ImageColor
+    out = Image.new("RGB", im.size, ImageColor.getrgb(background)[:3])
+    out.paste(im, (0, 0), im)
+    return out
+
+def to_output(im: "Image.Image", pil_fmt: str, info: Dict[str, Any], color: str="keep",
+              background: str="#ffffff") -> Tuple["Image.Image", Dict[str, Any]]:
+    """
+    The pixels to encode as pil_fmt, and info with the ICC profile they now carry. With
+    color="srgb" ICC-tagged RGB/RGBA/CMYK pixels are converted to sRGB (if ImageCms cannot,
+    RGB keeps its profile and CMYK is converted naively); JPEG outputs get transparency
+    flattened onto background. Conversions that would not change anything are skipped.
+    """
+    if color == "srgb":
+        t = transform(info.get("icc_profile"), im.mode)
+        if t is not None:
+            im = _cms().applyTransform(im, t); info = dict(info, icc_profile=srgb_profile())
+        elif im.mode == "CMYK":  # no usable profile: the naive conversion, untagged (= sRGB)
+            im = im.convert("RGB"); info = dict(info, icc_profile=None)
+    if pil_fmt == "JPEG": im = flatten(im, background)
+    return im, info
+
+def converts(im: "Image.Image", color: str) -> bool:
+    """Whether to_output would change im's colours (so its JPEG data cannot be reused as is)."""
+    return color == "srgb" and (im.mode == "CMYK" or transform(im.info.get("icc_profile"), im.mode) is not None)
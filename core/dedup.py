@@ -0,0 +1,27 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from .archive import source_digest, source_size
+from .parallel import run_bounded
+
+DEDUP_MODES = ("hardlink", "reflink", "copy")
+
+def find_duplicates(paths: Sequence[str], workers: int=4) -> Dict[int, Tuple[int, str]]:
+    """
+    Map the index of every input whose content repeats an earlier one to (index of that
+    first input, content digest). Sizes are compared first; only files sharing a size are
+    hashed, on a thread pool. Unreadable files are left alone for the resize to report.
+    """
+    by_size: Dict[int, List[int]] = defaultdict(list)
+    for k, p in enumerate(paths):
+        try: by_size[source_size(p)].append(k)
+        except OSError: pass
+    candidates = sorted(k for ks in by_size.values() if len(ks) > 1 for k in ks)
+    first: Dict[str, int] = {}; out: Dict[int, Tuple[int, str]] = {}
+    # results come back in input order: the first index with a digest is the one resized
+    hashed = run_bounded(source_digest, ((paths[k],) for k in candidates), workers, "thread")
+    for k, (_, digest, err) in zip(candidates, hashed):
+        if err is not None: continue
+        if digest in first: out[k] = (first[digest], digest)
+        else: first[digest] = k
+    return out
@@ -0,0 +1,65 @@
+import io
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Per-format save() settings. "balanced" is what _save has always done for JPEG
+# (optimize=True) plus Pillow's defaults spelled out for PNG/WEBP.
+ENCODER_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fastest": {
+        "JPEG": {"optimize": False, "progressive": False, "subsampling": 2},
+        "PNG": {"compress_level": 1},
+        "WEBP": {"method": 0, "quality": 80, "lossless": False},
+    },
+    "balanced": {
+        "JPEG": {"optimize": True},
+        "PNG": {"compress_level": 6},
+        "WEBP": {"method": 4, "quality": 80, "lossless": False},
+    },
+    "smallest": {
+        "JPEG": {"optimize": True, "progressive": True, "subsampling": 2},
+        "PNG": {"compress_level": 9, "optimize": True},
+        "WEBP": {"method": 6, "quality": 80, "lossless": False},
+    },
+}
+QUALITY_FORMATS = ("JPEG", "WEBP")
+MIN_TARGET_QUALITY = 10
+
+def encoder_settings(pil_fmt: str, profile: str="balanced", quality: Optional[int]=None) -> Dict[str, Any]:
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile '{profile}' (expected one of {', '.join(ENCODER_PROFILES)})")
+    kw = dict(ENCODER_PROFILES[profile].get(pil_fmt, {}))
+    if quality is not None and pil_fmt in QUALITY_FORMATS: kw["quality"] = int(quality)
+    return kw
+
+def prepare(im: "Image.Image", pil_fmt: str) -> "Image.Image":
+    if pil_fmt == "JPEG" and im.mode in ("RGBA", "LA", "P"):
+        im = im.convert("RGB")
+    return im
+
+def encode(im: "Image.Image", pil_fmt: str, profile: str="balanced", quality: Optional[int]=None,
+           extra: Optional[Dict[str, Any]]=None) -> bytes:
+    """extra: further save() arguments, e.g. icc_profile/exif."""
+    buf = io.BytesIO()
+    prepare(im, pil_fmt).save(buf, format=pil_fmt, **encoder_settings(pil_fmt, profile, quality), **(extra or {}))
+    return buf.getvalue()
+
+def encode_to_size(im: "Image.Image", pil_fmt: str, target_bytes: int, profile: str="balanced",
+                   max_quality: int=95, extra: Optional[Dict[str, Any]]=None) -> bytes:
+    """
+    Highest quality whose output fits target_bytes, by binary search over the same
+    (already resampled and mode-converted) buffer. If even the minimum quality is too
+    big, that smallest encoding is returned. Lossless formats are encoded once.
+    """
+    im = prepare(im, pil_fmt)
+    if pil_fmt not in QUALITY_FORMATS: return encode(im, pil_fmt, profile, extra=extra)
+    lo, hi = MIN_TARGET_QUALITY, max(MIN_TARGET_QUALITY, min(100, max_quality))
+    best: Optional[bytes] = None; smallest: Optional[bytes] = None
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = encode(im, pil_fmt, profile, q, extra)
+        if smallest is None or len(data) < len(smallest): smallest = data
+        if len(data) <= target_bytes: best = data; lo = q + 1
+        else: hi = q - 1
+    return best if best is not None else smallest
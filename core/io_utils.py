@@ -1,15 +1,61 @@
+import fnmatch
+import hashlib
 import os
-from typing import List
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 SUPPORTED_EXTS = {".jpg",".jpeg",".png",".webp",".bmp",".tiff"}
+Globs = Optional[Sequence[str]]
 
-def list_images(folder: str) -> List[str]:
-    out: List[str] = []
-    for root, _, files in os.walk(folder):
-        for n in files:
-            if os.path.splitext(n)[1] in SUPPORTED_EXTS:
-                out.append(os.path.join(root, n))
-    return out
+def _match(rel: str, name: str, globs: Sequence[str]) -> bool:
+    rel, name = rel.lower(), name.lower()
+    return any(fnmatch.fnmatchcase(rel, g.lower()) or fnmatch.fnmatchcase(name, g.lower()) for g in globs)
+
+def _dir_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+def iter_images(folder: str, include: Globs=None, exclude: Globs=None, recursive: bool=True,
+                skip_dirs: Globs=None) -> Iterator[str]:
+    """
+    Lazily yield supported images under folder (extensions matched case-insensitively).
+    include/exclude are case-insensitive globs tried against the name and the folder-relative path;
+    an excluded directory is not descended into, and neither are skip_dirs (paths, e.g. the
+    output folder of a batch reading this one) or symlinked directories, as with os.walk.
+    """
+    skip = {_dir_key(d) for d in skip_dirs or ()}
+    stack = [folder]
+    while stack:
+        d = stack.pop(); subdirs: List[str] = []
+        try: it = os.scandir(d)
+        except OSError: continue
+        with it:
+            for e in it:
+                rel = os.path.relpath(e.path, folder).replace(os.sep, "/")
+                if exclude and _match(rel, e.name, exclude): continue
+                try: is_dir, link_dir = e.is_dir(follow_symlinks=False), e.is_symlink() and e.is_dir()
+                except OSError: continue
+                if link_dir: continue
+                if is_dir:
+                    if recursive and (not skip or _dir_key(e.path) not in skip): subdirs.append(e.path)
+                elif os.path.splitext(e.name)[1].lower() in SUPPORTED_EXTS:
+                    if not include or _match(rel, e.name, include): yield e.path
+        stack.extend(reversed(subdirs))
+
+def list_images(folder: str, include: Globs=None, exclude: Globs=None) -> List[str]:
+    return list(iter_images(folder, include, exclude))
+
+_COUNT_CACHE: Dict[Tuple, Tuple[int, int]] = {}
+
+def count_images(folder: str, include: Globs=None, exclude: Globs=None, cached: bool=True) -> int:
+    # The cache is only invalidated by the top folder's mtime, so treat the value as an
+    # estimate when subfolders change; it exists to size progress bars, not to drive work.
+    key = (os.path.abspath(folder), tuple(include or ()), tuple(exclude or ()))
+    try: mtime = os.stat(folder).st_mtime_ns
+    except OSError: return 0
+    hit = _COUNT_CACHE.get(key)
+    if cached and hit and hit[0] == mtime: return hit[1]
+    n = sum(1 for _ in iter_images(folder, include, exclude))
+    _COUNT_CACHE[key] = (mtime, n)
+    return n
 
 def next_available(path: str) -> str:
     if not os.path.exists(path): return path
@@ -17,4 +63,12 @@ def next_available(path: str) -> str:
     while True:
         cand = f"{base}_{i}{ext}"
         if not os.path.isfile(cand): return cand
-        i += 1
\ No newline at end of file
+        i += 1
+
+def file_digest(path: str, chunk: int=1<<20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            b = f.read(chunk)
+            if not b: return h.hexdigest()
+            h.update(b)
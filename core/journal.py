@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import tarfile
+import time
+from dataclasses import asdict, fields
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .archive import ArchiveMember, iter_archive
+from .models import ResizeOptions, ResizeResult
+
+JOURNAL_NAME = ".resize_journal.sqlite"
+
+class _Stream:
+    """
+    The unfinished members of a compressed TAR, read from one pass over the archive as they
+    are asked for, so only the member being handed out is held. Asking out of archive order
+    starts a new pass.
+    """
+    def __init__(self, archive: str, want: Set[str]):
+        self.archive = archive; self.want = want
+        self._it: Optional[Iterator[ArchiveMember]] = None; self._broken = False
+
+    def get(self, entry: str) -> Optional[ArchiveMember]:
+        for fresh in ((True,) if self._it is None else (False, True)):
+            if self._broken: return None
+            if fresh: self.close(); self._it = iter_archive(self.archive, entries=self.want)
+            try:
+                for m in self._it:
+                    if m.entry == entry: return m
+            except (OSError, ValueError, tarfile.TarError):
+                self._broken = True  # the worker reports the plain path's error
+        return None
+
+    def close(self):
+        if self._it is not None: self._it.close(); self._it = None
+
+class Journal:
+    """
+    Crash-safe record of one batch in its output folder: the options, every planned input
+    (written before work starts) and, per input, the output name it was given and how it
+    ended. Planned names and outcomes are buffered and committed in batches (WAL, no fsync
+    per row); a name is always committed before its output can be written, so a resumed
+    batch rebuilds interrupted files in place instead of picking new names. Outcomes lost
+    with the last uncommitted batch only mean those files are redone.
+    Not thread-safe: use it from the thread driving the batch.
+    path puts the file elsewhere; chunk restricts the journal to that chunk of inputs (see
+    core.workqueue); wal=False keeps to the rollback journal, which unlike WAL works on
+    network filesystems.
+    """
+    def __init__(self, out_dir: str, commit_every: int=500, path: Optional[str]=None, chunk: Optional[int]=None,
+                 wal: bool=True):
+        self.path = path or os.path.join(out_dir, JOURNAL_NAME); self.chunk = chunk
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        if wal: self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS job (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+            seq INTEGER PRIMARY KEY, chunk INTEGER, src TEXT, archive TEXT, entry TEXT, offset INTEGER,
+            size INTEGER, streamed INTEGER, dst TEXT, status TEXT, error TEXT, result TEXT)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_chunk ON files (chunk)")
+        self.commit_every = commit_every
+        self._planned: List[Tuple[str, int]] = []
+        self._finished: List[tuple] = []
+
+    @classmethod
+    def create(cls, out_dir: str, inputs: Iterable[str], opts: ResizeOptions, commit_every: int=500) -> "Journal":
+        """Start a new journal for out_dir (replacing any previous one), recording opts and inputs."""
+        j = cls(out_dir, commit_every)
+        j.start(inputs, opts)
+        return j
+
+    def start(self, inputs: Iterable[str], opts: ResizeOptions, chunk_size: int=0, **info: str):
+        """
+        Record a new batch, replacing whatever was there: opts, info (extra key -> value) and
+        the inputs, numbered into chunks of chunk_size when that is set.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM job"); self.conn.execute("DELETE FROM files")
+            meta = {"options": json.dumps(asdict(opts)), "created": str(time.time()), "state": "running", **info}
+            self.conn.executemany("INSERT INTO job VALUES (?,?)", meta.items())
+            rows: list = []
+            for n, src in enumerate(inputs):
+                chunk = n // chunk_size if chunk_size else None
+                if isinstance(src, ArchiveMember):
+                    rows.append((chunk, str(src), src.archive, src.entry, src.offset, src.size, src.data is not None))
+                else: rows.append((chunk, str(src), None, None, None, None, False))
+                if len(rows) >= 1000: self._insert(rows); rows = []
+            self._insert(rows)
+
+    def _insert(self, rows: list):
+        self.conn.executemany("INSERT INTO files (chunk, src, archive, entry, offset, size, streamed) "
+                              "VALUES (?,?,?,?,?,?,?)", rows)
+
+    def info(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM job WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _open(self) -> Tuple[str, tuple]:
+        # WHERE clause for the inputs still to do (in this journal's chunk)
+        if self.chunk is None: return "status IS NULL", ()
+        return "status IS NULL AND chunk=?", (self.chunk,)
+
+    def options(self) -> ResizeOptions:
+        raw = self.info("options")
+        if raw is None: raise ValueError(f"{self.path} holds no batch")
+        known = {f.name for f in fields(ResizeOptions)}
+        return ResizeOptions(**{k: v for k, v in json.loads(raw).items() if k in known})
+
+    def counts(self) -> Tuple[int, int]:
+        """(inputs still to do, all inputs)"""
+        where, args = ("", ()) if self.chunk is None else (" WHERE chunk=?", (self.chunk,))
+        left, total = self.conn.execute("SELECT COUNT(*) - COUNT(status), COUNT(*) FROM files" + where, args).fetchone()
+        return left, total
+
+    def pending(self, page: int=1000) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """(seq, source, planned output or None) of every input without an outcome, in order."""
+        last = 0; streams: Dict[str, _Stream] = {}
+        where, args = self._open()
+        try:
+            while True:
+                rows = self.conn.execute("SELECT seq, src, archive, entry, offset, size, streamed, dst FROM files "
+                                         f"WHERE seq > ? AND {where} ORDER BY seq LIMIT ?", (last, *args, page)).fetchall()
+                if not rows: return
+                for seq, src, archive, entry, offset, size, is_streamed, dst in rows:
+                    last = seq
+                    if archive is None: yield seq, src, dst; continue
+                    if not is_streamed: yield seq, ArchiveMember(archive, entry, offset, size), dst; continue
+                    # members of compressed TARs can only be read by streaming: one pass per archive
+                    if archive not in streams: streams[archive] = _Stream(archive, self._unfinished_entries(archive))
+                    member = streams[archive].get(entry)
+                    yield seq, member if member is not None else src, dst
+        finally:
+            for s in streams.values(): s.close()
+
+    def _unfinished_entries(self, archive: str) -> Set[str]:
+        where, args = self._open()
+        return {e for (e,) in self.conn.execute(f"SELECT entry FROM files WHERE archive=? AND {where}", (archive, *args))}
+
+    def planned(self, seq: int, dst: str):
+        self._planned.append((dst, seq))
+
+    def commit(self):
+        """Write out the buffered names and outcomes (names must be in before their outputs)."""
+        if not self._planned and not self._finished: return
+        with self.conn:
+            self.conn.executemany("UPDATE files SET dst=? WHERE seq=?", self._planned)
+            self.conn.executemany("UPDATE files SET status=?, dst=?, error=?, result=? WHERE seq=?", self._finished)
+        self._planned, self._finished = [], []
+
+    def finished(self, seq: int, res: ResizeResult):
+        self._finished.append((res.status, res.dst_path, res.error, json.dumps(asdict(res)), seq))
+        if len(self._finished) >= self.commit_every: self.commit()
+
+    def results(self) -> Iterator[ResizeResult]:
+        """The recorded outcomes, in input order."""
+        where, args = ("", ()) if self.chunk is None else (" AND chunk=?", (self.chunk,))
+        for (raw,) in self.conn.execute(f"SELECT result FROM files WHERE result IS NOT NULL{where} ORDER BY seq", args):
+            d = json.loads(raw)
+            for k in ("in_size", "out_size"):
+                if d.get(k): d[k] = tuple(d[k])
+            yield ResizeResult(**d)
+
+    def close(self, complete: bool=False):
+        self.commit()
+        if complete:
+            with self.conn: self.conn.execute("UPDATE job SET value='done' WHERE key='state'")
+        self.conn.close()
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+from .models import ResizeOptions, ResizeResult
+from .io_utils import file_digest
+
+MANIFEST_NAME = ".resize_manifest.sqlite"
+
+def options_fingerprint(opts: ResizeOptions) -> str:
+    return hashlib.sha1(json.dumps(asdict(opts), sort_keys=True).encode()).hexdigest()[:16]
+
+class Manifest:
+    """
+    Per-output-folder record of what was built from which source. An entry is fresh when
+    the source size and mtime still match; if only the mtime moved, the content hash decides.
+    An output is only ever handed to one source per batch, and recording an output drops
+    older entries that pointed other sources at the same file.
+    Not thread-safe: use it from the thread driving the batch.
+    """
+    def __init__(self, out_dir: str, commit_every: int=200):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+            src TEXT, fingerprint TEXT, size INTEGER, mtime_ns INTEGER, digest TEXT,
+            dst TEXT, in_w INTEGER, in_h INTEGER, out_w INTEGER, out_h INTEGER,
+            PRIMARY KEY (src, fingerprint))""")
+        self.commit_every = commit_every; self._dirty = 0
+        self._given: Dict[str, str] = {}  # normcased dst -> source it was handed to in this batch
+
+    def outputs(self, fingerprint: str) -> List[str]:
+        """Every output recorded for fingerprint, so new sources can be kept off those names."""
+        return [r[0] for r in self.conn.execute("SELECT dst FROM entries WHERE fingerprint=?", (fingerprint,))]
+
+    def check(self, src: str, fingerprint: str) -> Tuple[Optional[ResizeResult], Optional[str]]:
+        """Return (skipped result, None) when up to date, else (None, dst to rebuild in place or None)."""
+        key = os.path.abspath(src)
+        row = self.conn.execute("SELECT size, mtime_ns, digest, dst, in_w, in_h, out_w, out_h FROM entries "
+                                "WHERE src=? AND fingerprint=?", (key, fingerprint)).fetchone()
+        if row is None: return None, None
+        size, mtime_ns, digest, dst, in_w, in_h, out_w, out_h = row
+        if self._given.setdefault(os.path.normcase(dst), key) != key: return None, None  # another source's now
+        if not os.path.isfile(dst): return None, dst
+        st = os.stat(src)
+        if st.st_size != size: return None, dst
+        if st.st_mtime_ns != mtime_ns:
+            if file_digest(src) != digest: return None, dst
+            self.conn.execute("UPDATE entries SET mtime_ns=? WHERE src=? AND fingerprint=?", (st.st_mtime_ns, key, fingerprint))
+            self._touch()
+        return ResizeResult(src, dst, True, None, (in_w, in_h), (out_w, out_h), "skipped", digest), None
+
+    def record(self, res: ResizeResult, fingerprint: str):
+        st = os.stat(res.src_path)
+        digest = res.src_digest or file_digest(res.src_path)
+        (in_w, in_h), (out_w, out_h) = res.in_size, res.out_size
+        key = os.path.abspath(res.src_path); self._given[os.path.normcase(res.dst_path)] = key
+        self.conn.execute("DELETE FROM entries WHERE dst=? AND fingerprint=? AND src<>?", (res.dst_path, fingerprint, key))
+        self.conn.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?,?)",
+                          (key, fingerprint, st.st_size, st.st_mtime_ns, digest,
+                           res.dst_path, in_w, in_h, out_w, out_h))
+        self._touch()
+
+    def _touch(self):
+        self._dirty += 1
+        if self._dirty >= self.commit_every: self.conn.commit(); self._dirty = 0
+
+    def close(self):
+        self.conn.commit(); self.conn.close()
@@ -0,0 +1,114 @@
+import shutil
+import struct
+import subprocess
+from functools import lru_cache
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+ORIENTATION_TAG = 0x0112
+SWAPS_AXES = (5, 6, 7, 8)  # orientations whose displayed width is the stored height
+META_FORMATS = ("JPEG", "PNG", "WEBP", "TIFF")  # outputs that can carry ICC/EXIF
+
+def orientation(im: "Image.Image") -> int:
+    # Only look at what the header parse already read: Image.getexif() on some formats
+    # (PNG) loads the pixels to find a trailing eXIf chunk.
+    exif = im.info.get("exif")
+    if exif:
+        from PIL import Image
+        e = Image.Exif(); e.load(exif)
+        o = int(e.get(ORIENTATION_TAG, 1) or 1)
+    else:
+        tags = getattr(im, "tag_v2", None)
+        o = int(tags.get(ORIENTATION_TAG, 1)) if tags else 1
+    return o if 1 <= o <= 8 else 1
+
+def oriented(size, o: int):
+    return (size[1], size[0]) if o in SWAPS_AXES else tuple(size)
+
+def apply_orientation(im: "Image.Image", o: int) -> "Image.Image":
+    """Turn stored pixels upright (meant for the already downscaled image)."""
+    from PIL import Image
+    T = Image.Transpose
+    ops = {2: T.FLIP_LEFT_RIGHT, 3: T.ROTATE_180, 4: T.FLIP_TOP_BOTTOM, 5: T.TRANSPOSE,
+           6: T.ROTATE_270, 7: T.TRANSVERSE, 8: T.ROTATE_90}
+    return im.transpose(ops[o]) if o in ops else im
+
+def save_params(info: Dict[str, Any], pil_fmt: str, keep_icc: bool, keep_exif: bool, upright: bool) -> Dict[str, Any]:
+    """
+    ICC/EXIF save() arguments from the source's info dict (read along with the header or
+    the decode already being done). With upright, pixels were rotated, so the orientation
+    tag is reset to 1. Everything not kept is passed as empty so no encoder copies it over.
+    """
+    if pil_fmt not in META_FORMATS: return {}
+    out: Dict[str, Any] = {"icc_profile": info.get("icc_profile") if keep_icc else None}
+    exif = info.get("exif") if keep_exif else None
+    if exif and upright:
+        from PIL import Image
+        e = Image.Exif(); e.load(exif)
+        if e.get(ORIENTATION_TAG, 1) != 1: e[ORIENTATION_TAG] = 1; exif = e.tobytes()
+    if exif: out["exif"] = exif
+    return out
+
+# ---- byte-level JPEG: metadata without recompression ----
+
+def _segments(data: bytes):
+    """(marker, start, end) of each marker segment before the scan; raises on a non-JPEG."""
+    if data[:2] != b"\xff\xd8": raise ValueError("not a JPEG")
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF: raise ValueError("corrupt JPEG marker")
+        marker = data[pos+1]
+        if marker == 0xFF: pos += 1; continue  # fill byte
+        length = struct.unpack(">H", data[pos+2:pos+4])[0]
+        yield marker, pos, pos + 2 + length
+        if marker == 0xDA: return  # start of scan: the rest is entropy-coded data
+        pos += 2 + length
+
+def strip_jpeg_metadata(data: bytes, keep_icc: bool=True, keep_exif: bool=False) -> bytes:
+    """Drop EXIF/XMP (APP1), IPTC (APP13) and comments unless keep_exif, ICC (APP2) unless keep_icc."""
+    out = [data[:2]]; last = 2
+    for marker, start, end in _segments(data):
+        body = data[start+4:end]
+        drop = ((marker in (0xE1, 0xED, 0xFE) and not keep_exif) or
+                (marker == 0xE2 and body.startswith(b"ICC_PROFILE\0") and not keep_icc))
+        if not drop: out.append(data[start:end])
+        last = end
+    out.append(data[last:])
+    return b"".join(out)
+
+def reset_jpeg_orientation(data: bytes) -> bytes:
+    """Set the EXIF orientation tag to 1 in place (same length), if there is one."""
+    for marker, start, end in _segments(data):
+        if marker != 0xE1 or data[start+4:start+10] != b"Exif\0\0": continue
+        tiff = start + 10
+        bo = "<" if data[tiff:tiff+2] == b"II" else ">"
+        ifd = tiff + struct.unpack(bo + "I", data[tiff+4:tiff+8])[0]
+        n = struct.unpack(bo + "H", data[ifd:ifd+2])[0]
+        for i in range(n):
+            entry = ifd + 2 + 12*i
+            if struct.unpack(bo + "H", data[entry:entry+2])[0] == ORIENTATION_TAG:
+                buf = bytearray(data); buf[entry+8:entry+10] = struct.pack(bo + "H", 1)
+                return bytes(buf)
+    return data
+
+_JPEGTRAN_OPS = {2: ["-flip", "horizontal"], 3: ["-rotate", "180"], 4: ["-flip", "vertical"],
+                 5: ["-transpose"], 6: ["-rotate", "90"], 7: ["-transverse"], 8: ["-rotate", "270"]}
+
+@lru_cache(maxsize=1)
+def jpegtran() -> Optional[str]:
+    return shutil.which("jpegtran")
+
+def jpegtran_orient(data: bytes, o: int) -> Optional[bytes]:
+    """
+    Losslessly turn a JPEG upright with jpegtran -perfect (all markers copied). None when
+    jpegtran is missing or the transform cannot be exact (partial MCUs on an edge).
+    """
+    tool = jpegtran()
+    if tool is None or o not in _JPEGTRAN_OPS: return None
+    try:
+        p = subprocess.run([tool, "-perfect", "-copy", "all", *_JPEGTRAN_OPS[o]], input=data,
+                           stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60)
+    except (OSError, subprocess.SubprocessError): return None
+    return p.stdout if p.returncode == 0 and p.stdout else None
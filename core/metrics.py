@@ -0,0 +1,55 @@
+import os
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence
+from .models import ResizeResult
+
+STAGES = ("hash", "decode", "resample", "encode", "write")
+
+# hook(stage, seconds, result), called from the thread driving resize_many once a result is
+# back from its worker. If the hook is also a context manager, the batch runs inside it.
+MetricsHook = Callable[[str, float, ResizeResult], None]
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile of values (p in 0..100)."""
+    if not values: return 0.0
+    s = sorted(values)
+    return s[min(len(s)-1, max(0, round(p/100 * len(s)) - 1))]
+
+def format_key(res: ResizeResult) -> str:
+    src = os.path.splitext(res.src_path)[1].lstrip(".").lower()
+    dst = os.path.splitext(res.dst_path or "")[1].lstrip(".").lower()
+    return f"{src}->{dst}"
+
+class BatchStats:
+    """
+    Metrics hook that aggregates stage durations and byte counts for a batch:
+
+        with BatchStats() as stats:
+            for res in resize_many(files, out, opts, metrics=stats): ...
+        print(stats.summary())
+    """
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.by_format: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self.images = 0; self.in_bytes = 0; self.out_bytes = 0
+        self._seen: Optional[ResizeResult] = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+    def __call__(self, stage: str, seconds: float, res: ResizeResult):
+        if res is not self._seen:
+            self._seen = res; self.images += 1
+            self.in_bytes += res.in_bytes or 0; self.out_bytes += res.out_bytes or 0
+        self.stages[stage].append(seconds)
+        self.by_format[format_key(res)][stage].append(seconds)
+
+    @staticmethod
+    def _describe(d: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+        return {k: {"n": len(v), "p50_ms": round(percentile(v, 50)*1000, 3), "p95_ms": round(percentile(v, 95)*1000, 3),
+                    "total_s": round(sum(v), 4)} for k, v in d.items()}
+
+    def summary(self) -> dict:
+        return {"images": self.images, "in_bytes": self.in_bytes, "out_bytes": self.out_bytes,
+                "stages": self._describe(self.stages),
+                "by_format": {f: self._describe(d) for f, d in self.by_format.items()}}
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 @dataclass(frozen=True)
 class ResizeOptions:
@@ -11,6 +11,18 @@ class ResizeOptions:
     format_choice: str="keep"
     append_suffix: bool=True
     jpg_quality: int=85
+    fast_decode: bool=True
+    naming: str="counter"  # counter | hash | overwrite
+    encoder_profile: str="balanced"  # fastest | balanced | smallest
+    target_bytes: Optional[int]=None  # JPEG/WEBP: highest quality (<= jpg_quality) that fits
+    resampler: str="pillow"  # pillow | numpy (stacks same-size images, needs NumPy)
+    auto_orient: bool=True  # honour EXIF orientation (sizes are for the upright image)
+    keep_icc: bool=True
+    keep_exif: bool=False
+    lossless: bool=False  # same-size JPEG -> JPEG: copy/rotate the JPEG data instead of re-encoding (ignores jpg_quality/encoder_profile)
+    color: str="keep"  # keep | srgb (convert ICC-tagged images to sRGB)
+    background: str="#ffffff"  # what transparency is flattened onto for JPEG, and contain pads with
+    fit: str="scale"  # scale | cover | contain | smart: with width and height, make exactly that tile
 
 @dataclass
 class ResizeResult:
@@ -19,4 +31,49 @@ class ResizeResult:
     ok: bool
     error: Optional[str] = None
     in_size: Optional[Tuple[int, int]] = None
-    out_size: Optional[Tuple[int, int]] = None
\ No newline at end of file
+    out_size: Optional[Tuple[int, int]] = None
+    status: str = ""  # "ok" | "error" | "skipped"
+    src_digest: Optional[str] = None
+    elapsed: Optional[float] = None  # seconds spent in the worker
+    # filled only when resize_many runs with a metrics hook
+    timings: Optional[Dict[str, float]] = None  # stage -> seconds
+    in_bytes: Optional[int] = None
+    out_bytes: Optional[int] = None
+    dedup_of: Optional[str] = None  # duplicate input: the source whose output it was served from
+
+    def __post_init__(self):
+        if not self.status: self.status = "ok" if self.ok else "error"
+        if type(self.src_path) is not str: self.src_path = str(self.src_path)  # e.g. an ArchiveMember
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    opts: ResizeOptions
+
+@dataclass
+class RenditionResult:
+    src_path: str
+    results: List[ResizeResult]
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.results) and all(r.ok for r in self.results)
+
+@dataclass(frozen=True)
+class ImageInfo:
+    path: str
+    size: Optional[Tuple[int, int]] = None
+    format: Optional[str] = None
+    mode: Optional[str] = None
+    orientation: int = 1  # EXIF orientation, 1 = upright
+    file_bytes: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def oriented_size(self) -> Optional[Tuple[int, int]]:
+        if self.size and self.orientation in (5, 6, 7, 8): return self.size[1], self.size[0]
+        return self.size
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Set
+
+NAMING_STRATEGIES = ("counter", "hash", "overwrite")
+
+class NameAllocator:
+    """
+    Collision-free output names for one directory. The directory is listed once and taken
+    names are tracked in memory, so allocation costs no stat calls; each name is claimed
+    with an exclusive create, which keeps concurrent processes sharing the folder apart.
+    Strategies: "counter" (name, name_2, ...), "hash" (name_<hash of source path>, stable
+    across runs, so a re-run replaces its own outputs) and "overwrite".
+    """
+    def __init__(self, out_dir: str, reserve: bool=True):
+        self.out_dir = out_dir; self.reserve = reserve
+        self._taken: Set[str] = {os.path.normcase(n) for n in os.listdir(out_dir)} if os.path.isdir(out_dir) else set()
+        self._issued: Set[str] = set()
+        self._next: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, stem: str, ext: str, strategy: str="counter", key: str="") -> str:
+        if strategy not in NAMING_STRATEGIES:
+            raise ValueError(f"Unknown naming strategy '{strategy}' (expected one of {', '.join(NAMING_STRATEGIES)})")
+        with self._lock:
+            if strategy == "overwrite": return self._claim(stem + ext)
+            if strategy == "hash":
+                name = f"{stem}_{hashlib.blake2s(key.encode(), digest_size=4).hexdigest()}{ext}"
+                if os.path.normcase(name) not in self._issued: return self._claim(name)
+            if self._free(stem + ext): return self._claim(stem + ext)
+            i = self._next.get(stem + ext, 2)
+            while not self._free(f"{stem}_{i}{ext}"): i += 1
+            self._next[stem + ext] = i + 1
+            return self._claim(f"{stem}_{i}{ext}")
+
+    def issued(self, path: str) -> bool:
+        """Whether path is a name this allocator handed out (e.g. an output met again as an input)."""
+        d, name = os.path.split(os.path.abspath(path))
+        return (os.path.normcase(name) in self._issued
+                and os.path.normcase(d) == os.path.normcase(os.path.abspath(self.out_dir)))
+
+    def claim(self, path: str):
+        """Mark an existing path (e.g. one being rebuilt in place) as taken."""
+        with self._lock: self._taken.add(os.path.normcase(os.path.basename(path)))
+
+    def release(self, path: str):
+        """Drop the empty placeholder of a reservation whose output was never written."""
+        if not self.reserve: return  # nothing was created on disk (e.g. names inside an archive)
+        try:
+            if os.path.getsize(path) == 0: os.remove(path)
+        except OSError:
+            pass
+
+    def _free(self, name: str) -> bool:
+        if os.path.normcase(name) in self._taken: return False
+        if not self.reserve: return True
+        try: os.close(os.open(os.path.join(self.out_dir, name), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            self._taken.add(os.path.normcase(name)); return False
+        return True
+
+    def _claim(self, name: str) -> str:
+        self._taken.add(os.path.normcase(name)); self._issued.add(os.path.normcase(name))
+        return os.path.join(self.out_dir, name)
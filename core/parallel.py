@@ -0,0 +1,132 @@
+import os
+import signal
+from collections import deque, namedtuple
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+EXECUTOR_KINDS = ("process", "thread")
+
+# A job whose result is already known: it keeps its place in the output order but never
+# reaches the pool.
+Ready = namedtuple("Ready", "job result")
+
+def resolve_workers(workers: int) -> int:
+    """0 or a negative count means one worker per CPU."""
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+def _ignore_sigint():
+    # Ctrl+C goes to the whole process group; the parent decides how to stop its workers.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def make_executor(workers: int, kind: str="process") -> Executor:
+    if kind == "process": return ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+    if kind == "thread": return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor '{kind}' (expected one of {', '.join(EXECUTOR_KINDS)})")
+
+class WorkerPool:
+    """
+    An executor that outlives single batches (e.g. for a watch loop). It is created on first
+    use, replaced by reset() after a worker crash, and shut down by close().
+    """
+    def __init__(self, workers: int=0, kind: str="process"):
+        self.workers = resolve_workers(workers); self.kind = kind
+        self._ex: Optional[Executor] = None
+
+    def get(self) -> Executor:
+        if self._ex is None: self._ex = make_executor(self.workers, self.kind)
+        return self._ex
+
+    def reset(self) -> Executor:
+        if self._ex is not None: self._ex.shutdown(wait=False, cancel_futures=True)
+        self._ex = None
+        return self.get()
+
+    def close(self):
+        if self._ex is not None: self._ex.shutdown(wait=True, cancel_futures=True)
+        self._ex = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def _broken(fut: Future) -> bool:
+    # lost with a crashed pool (futures it never started are cancelled when it is replaced)
+    return fut.cancelled() or isinstance(fut.exception(), BrokenProcessPool)
+
+def run_bounded(fn: Callable[..., Any], jobs: Iterable[Tuple], workers: int=1, kind: str="process",
+                max_in_flight: Optional[int]=None, ordered: bool=True,
+                weigh: Optional[Callable[[Tuple], int]]=None, budget: Optional[int]=None,
+                pool: Optional[WorkerPool]=None) -> Iterator[Tuple[Tuple, Any, Optional[BaseException]]]:
+    """
+    Run fn(*job) for every job tuple, yielding (job, result, error) in the caller's thread.
+    At most max_in_flight jobs are submitted at once and jobs are pulled lazily, so the
+    caller keeps control of memory. With weigh/budget, a job is only admitted while the
+    summed weight of jobs in flight stays within budget (a job heavier than the whole
+    budget runs alone). A crashed worker fails only the job that crashed it: the pool is
+    rebuilt, the jobs it took down are rerun there one at a time, and the batch carries on.
+    With pool, its executor is used (workers/kind are taken from it) and left running afterwards.
+    """
+    own = pool is None
+    if own: pool = WorkerPool(workers, kind)
+    workers = pool.workers
+    if workers == 1:
+        for job in jobs:
+            if isinstance(job, Ready): yield job.job, job.result, None; continue
+            try: res, err = fn(*job), None
+            except Exception as e: res, err = None, e
+            yield job, res, err
+        return
+
+    limit = max(1, max_in_flight or workers * 2)
+    ex = pool.get(); gen = 0
+    pending: deque = deque()  # (job, future, pool generation, weight) in submission order
+    it = iter(jobs)
+    held: Optional[Tuple[Any, int]] = None  # next job, pulled but not yet admitted
+    used = 0
+
+    def recover():
+        # The pool broke under the jobs in flight; rerun each on a fresh pool by itself, so the
+        # one that crashes it again is the only failure. Reruns are final (generation None).
+        nonlocal ex, gen
+        ex = pool.reset(); gen += 1
+        for i, (job, fut, fut_gen, w) in enumerate(pending):
+            if fut_gen is None or not _broken(fut): continue
+            rerun = ex.submit(fn, *job)
+            if _broken(rerun): ex = pool.reset(); gen += 1
+            pending[i] = (job, rerun, None, w)
+
+    try:
+        while True:
+            while len(pending) < limit:
+                if held is None:
+                    job = next(it, None)
+                    if job is None: break
+                    held = (job, weigh(job) if weigh and budget and not isinstance(job, Ready) else 0)
+                job, w = held
+                if w and pending and used + w > budget: break
+                held = None
+                if isinstance(job, Ready):
+                    fut = Future(); fut.set_result(job.result)
+                    pending.append((job.job, fut, gen, 0)); continue
+                try: fut = ex.submit(fn, *job)
+                except BrokenProcessPool:
+                    recover(); fut = ex.submit(fn, *job)
+                pending.append((job, fut, gen, w)); used += w
+            if not pending: return
+
+            if ordered: idx = 0
+            else:
+                done, _ = wait([p[1] for p in pending], return_when=FIRST_COMPLETED)
+                idx = next(i for i, p in enumerate(pending) if p[1] in done)
+            job, fut, fut_gen, w = pending[idx]
+            if fut_gen == gen and _broken(fut):
+                recover(); continue
+            del pending[idx]; used -= w
+
+            try: res, err = fut.result(), None
+            except Exception as e: res, err = None, e
+            yield job, res, err
+    finally:
+        if own: ex.shutdown(wait=False, cancel_futures=True)
+        else:
+            for _, fut, _, _ in pending: fut.cancel()
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional
+
+from .archive import ArchiveMember
+
+class Prefetched(str):
+    """A source path whose bytes were read ahead: decoding opens them from memory."""
+    data: Optional[bytes]
+
+    def __new__(cls, path: str, data: Optional[bytes]):
+        self = super().__new__(cls, path)
+        self.data = data
+        return self
+
+    def __reduce__(self):
+        return Prefetched, (str(self), self.data)
+
+class Prefetcher:
+    """
+    Reads the next source files on a few I/O threads while earlier ones are being resized,
+    so storage latency (network shares, cold disks) overlaps with decode/encode. At most
+    lookahead files are read ahead, and no read beyond the next file starts while the
+    bytes held (being read or read, not yet released) exceed max_bytes: a read books the
+    file's size when it is submitted, not when it finishes. Archive members pass through.
+    Reusable across batches; hits (already read when asked for), misses and stall
+    seconds accumulate.
+    """
+    def __init__(self, max_bytes: int=64 << 20, threads: int=4, lookahead: Optional[int]=None):
+        self.max_bytes = max_bytes; self.threads = max(1, threads)
+        self.lookahead = lookahead or self.threads * 4
+        self._lock = threading.Lock()
+        self._out: Dict[int, Prefetched] = {}  # handed out, not yet released
+        self.held = self.bytes_read = self.hits = self.misses = 0
+        self.stall = 0.0
+
+    def _book(self, n: int):
+        with self._lock: self.held += n
+
+    def _fetch(self, path: str, booked: int) -> Prefetched:
+        try:
+            with open(path, "rb") as f: data = f.read()
+        except BaseException:
+            self._book(-booked); raise
+        with self._lock: self.held += len(data) - booked; self.bytes_read += len(data)
+        return Prefetched(path, data)
+
+    def _submit(self, pool: ThreadPoolExecutor, path: str):
+        try: size = os.path.getsize(path)
+        except OSError: size = 0  # the read fails too, and the worker reports it
+        self._book(size)
+        return pool.submit(self._fetch, path, size), size
+
+    def iter(self, inputs: Iterable[str]) -> Iterator[str]:
+        """Yield inputs in order, as Prefetched where the read worked (else the plain path)."""
+        it = iter(inputs); ahead: deque = deque(); more = True
+        pool = ThreadPoolExecutor(self.threads, thread_name_prefix="prefetch")
+        try:
+            while True:
+                while more and len(ahead) < self.lookahead and (not ahead or self.held < self.max_bytes):
+                    src = next(it, None)
+                    if src is None: more = False; break
+                    ahead.append((src, *((None, 0) if isinstance(src, ArchiveMember) else self._submit(pool, src))))
+                if not ahead: return
+                src, fut, _ = ahead.popleft()
+                if fut is None: yield src; continue
+                if fut.done(): self.hits += 1
+                else:
+                    t = time.perf_counter(); fut.exception()  # waits, without raising
+                    self.stall += time.perf_counter() - t; self.misses += 1
+                if fut.exception() is not None: yield src; continue  # the worker reports it
+                item = fut.result(); self._out[id(item)] = item
+                yield item
+        except GeneratorExit:
+            # the consumer gave up: whatever it still holds falls back to reading the file
+            for item in list(self._out.values()): self.release(item)
+            raise
+        finally:
+            for _, fut, size in ahead:
+                if fut is None: continue
+                if fut.cancel(): self._book(-size)
+                elif fut.exception() is None: self.release(fut.result())
+            pool.shutdown(wait=False)
+
+    def release(self, src: str):
+        """Drop the bytes of a source that is done with (called once its result is in)."""
+        data = src.data if isinstance(src, Prefetched) else None
+        if data is None: return
+        src.data = None; self._out.pop(id(src), None)
+        with self._lock: self.held -= len(data)
+
+    def stats(self) -> dict:
+        looked = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / looked, 3) if looked else 0.0,
+                "stall_s": round(self.stall, 3), "bytes_read": self.bytes_read}
@@ -0,0 +1,60 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Tuple
+from .metadata import orientation
+from .models import ImageInfo, ResizeOptions
+from .parallel import run_bounded
+from .resize_service import EXT_TO_PIL
+
+_CACHE: "OrderedDict[str, Tuple[int, int, ImageInfo]]" = OrderedDict()
+_CACHE_MAX = 200_000
+_LOCK = threading.Lock()
+
+# Rough compressed bits per output pixel, used when the output format differs from the source.
+_BITS_PER_PIXEL = {"PNG": 12.0, "WEBP": 1.2, "BMP": 24.0, "TIFF": 24.0}
+
+def probe(path: str, use_cache: bool=True) -> ImageInfo:
+    """Dimensions, format, mode and EXIF orientation read from the file header only."""
+    try: st = os.stat(path)
+    except OSError as e: return ImageInfo(path, error=str(e))
+    if use_cache:
+        with _LOCK:
+            hit = _CACHE.get(path)
+            if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                _CACHE.move_to_end(path); return hit[2]
+    from PIL import Image
+    try:
+        with Image.open(path) as im:
+            info = ImageInfo(path, im.size, im.format, im.mode, orientation(im), st.st_size)
+    except Exception as e:
+        info = ImageInfo(path, file_bytes=st.st_size, error=str(e))
+    with _LOCK:
+        _CACHE[path] = (st.st_mtime_ns, st.st_size, info); _CACHE.move_to_end(path)
+        while len(_CACHE) > _CACHE_MAX: _CACHE.popitem(last=False)
+    return info
+
+def probe_many(paths: Iterable[str], workers: int=8, use_cache: bool=True) -> Iterator[ImageInfo]:
+    """probe() over a thread pool (header reads are I/O bound), yielded in input order."""
+    for job, info, err in run_bounded(probe, ((p, use_cache) for p in paths), workers, "thread", workers * 4):
+        yield info if err is None else ImageInfo(job[0], error=str(err))
+
+def clear_cache():
+    with _LOCK: _CACHE.clear()
+
+def estimate_output_bytes(info: ImageInfo, target: Tuple[int, int], opts: ResizeOptions,
+                          out_format: Optional[str]=None) -> Optional[int]:
+    """
+    Ballpark encoded size of the output. Same-format outputs scale the source's bytes per
+    pixel; conversions use a per-format rate (JPEG from its quality).
+    """
+    if not info.ok or not info.size: return None
+    pixels = target[0] * target[1]
+    fmt = out_format or (info.format if opts.format_choice == "keep" else EXT_TO_PIL.get(opts.format_choice))
+    if fmt == info.format and info.file_bytes:
+        return int(info.file_bytes * pixels / max(1, info.size[0] * info.size[1]))
+    if fmt == "JPEG":
+        q = max(1, min(100, opts.jpg_quality))
+        bpp = 0.8 + (q - 50) / 45 * 2.2 if q <= 95 else 3.0 + (q - 95) * 0.6
+        return int(pixels * max(0.3, bpp) / 8)
+    return int(pixels * _BITS_PER_PIXEL.get(fmt or "", 8.0) / 8)
@@ -1,9 +1,34 @@
+from __future__ import annotations
+import contextlib
 import os
-from typing import Iterable, Callable, Iterator, Tuple
-from PIL import Image
-from .models import ResizeOptions, ResizeResult
-from .io_utils import next_available
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Iterable, Callable, Iterator, List, Optional, Sequence, Sized, Tuple, Union
+from .models import ResizeOptions, ResizeResult, Rendition, RenditionResult
+from .encoders import encode, encode_to_size
+from .archive import ArchiveMember, ArchiveWriter, is_archive, open_source, read_source, source_digest, source_size
+from .cache import DecodedCache
+from .color import converts, to_output
+from .crop import center_box, fit_mode, pad, scaled_size, smart_box
+from .dedup import DEDUP_MODES, find_duplicates
+from .naming import NameAllocator
+from .journal import JOURNAL_NAME, Journal
+from .manifest import Manifest, options_fingerprint
+from .metadata import (apply_orientation, jpegtran_orient, orientation, oriented, reset_jpeg_orientation,
+                       save_params, strip_jpeg_metadata)
+from .metrics import MetricsHook
+from .prefetch import Prefetcher
+from .parallel import Ready, WorkerPool, resolve_workers, run_bounded
+from .writer import OutputWriter, copy_atomic, write_atomic
 
+# Pillow is imported where images are touched so that importing core (e.g. for the CLI)
+# stays cheap until work actually starts.
+if TYPE_CHECKING:
+    from PIL import Image
+
+RESAMPLERS = ("pillow", "numpy")
+_DUPLICATE = object()  # Ready result of a duplicate input: served from its canonical's output
 EXT_TO_PIL = {"jpg":"JPEG","jpeg":"JPEG","png":"PNG","webp":"WEBP","bmp":"BMP","tiff":"TIFF"}
 ProgressCb = Callable[[int, int], None]
 LogCb = Callable[[str], None]
@@ -13,6 +38,7 @@ def calc_target_size(sw:int, sh:int, opts:ResizeOptions) -> Tuple[int, int]:
         f = max(1.0, opts.percent)/100.0
         return max(1, round(sw*f)), max(1, round(sh*f))
     w, h = opts.width_px, opts.height_px
+    if w and h and opts.fit != "scale": return w, h  # cover/contain/smart: exactly the tile
     if opts.keep_aspect:
         if w and not h: return w, max(1, round(sh*(w/sw)))
         if h and not w: return max(1, round(sw*(h/sh))), h
@@ -22,39 +48,645 @@ def calc_target_size(sw:int, sh:int, opts:ResizeOptions) -> Tuple[int, int]:
         return sw, sh
     return (w or sw), (h or sh)
 
-def _save(im:Image.Image, dst:str, pil_fmt:str, jpg_quality:int):
-    if pil_fmt == "JPEG" and im.mode in ("RGBA", "LA", "P"):
-        im = im.convert("RGB")
-    kw = {"quality": int(jpg_quality), "optimize": True} if pil_fmt == "JPEG" else {}
-    im.save(dst, format=pil_fmt, **kw)
+def _reduce_on_decode(im:Image.Image, tw:int, th:int):
+    # Ask the decoder for the smallest power-of-two reduction that still covers the
+    # target, so the exact resample below only finishes the job. Must run before load().
+    sw, sh = im.size
+    if im.format == "JPEG":
+        im.draft(im.mode, (tw, th))
+    elif im.format == "JPEG2000":
+        f = 0
+        while (sw >> (f+1)) >= tw and (sh >> (f+1)) >= th: f += 1
+        im.reduce = f
+
+def _pixel_bytes(mode:str) -> int:
+    # Pillow's in-memory pixel size: 1 byte for 1/L/P, 2 for I;16*, 4 for everything else
+    # (RGB included, which is stored padded to 32 bits).
+    if mode in ("1", "L", "P"): return 1
+    return 2 if mode.startswith("I;16") else 4
+
+def _decoded_size(im:Image.Image, tw:int, th:int, fast_decode:bool) -> Tuple[int, int]:
+    sw, sh = im.size
+    if fast_decode and im.format == "JPEG" and tw<sw and th<sh:
+        scale = 1
+        while scale < 8 and sw // (scale*2) >= tw and sh // (scale*2) >= th: scale *= 2
+        return -(-sw // scale), -(-sh // scale)
+    return sw, sh
+
+def estimate_memory(src:str, opts:ResizeOptions) -> int:
+    """Approximate peak bytes to resize src, from its header only (decode, resample and target buffers)."""
+    from PIL import Image
+    with Image.open(open_source(src)) as im:
+        tw, th = calc_target_size(*im.size, opts)
+        dw, dh = _decoded_size(im, *_decode_target(im.size, (tw, th), opts), opts.fast_decode)
+        return (dw*dh + tw*dh + tw*th) * _pixel_bytes(im.mode)
+
+_RAW_BITS = {"1": 1, "L": 8, "P": 8, "LA": 16, "I;16": 16, "I;16B": 16, "BGR;24": 24, "RGB": 24, "BGR": 24,
+             "RGBA": 32, "RGBX": 32, "BGRA": 32, "BGRX": 32, "CMYK": 32, "I": 32, "F": 32}
+
+def _band_tiles(im:Image.Image) -> Optional[Callable[[int, int], Tuple[int, int, list]]]:
+    """
+    For formats that can be decoded a band of rows at a time (full-width strips, or a single
+    raw tile whose row layout is known), return f(y0, y1) -> (ty0, ty1, tiles) giving the
+    decoder tiles for a band covering rows y0..y1, rebased to the band's origin.
+    """
+    w, h = im.size
+    tiles = sorted(im.tile, key=lambda t: t[1][1])
+    if len(tiles) > 1 and all(t[1][0] == 0 and t[1][2] == w for t in tiles):
+        def strips(y0, y1):
+            used = [t for t in tiles if t[1][3] > y0 and t[1][1] < y1]
+            ty0, ty1 = used[0][1][1], used[-1][1][3]
+            return ty0, ty1, [(t[0], (0, t[1][1]-ty0, w, t[1][3]-ty0)) + tuple(t[2:]) for t in used]
+        return strips
+    if len(tiles) == 1 and tiles[0][0] == "raw" and tiles[0][1] == (0, 0, w, h):
+        _, _, offset, args = tiles[0]
+        rawmode, stride, ystep = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+        bits = _RAW_BITS.get(rawmode)
+        if bits is None or ystep not in (1, -1): return None
+        stride = stride or (w * bits + 7) // 8
+        def rows(y0, y1):
+            start = y0 if ystep == 1 else h - y1  # bottom-up files store the last row first
+            return y0, y1, [("raw", (0, 0, w, y1-y0), offset + start*stride, (rawmode, stride, ystep))]
+        return rows
+    return None
+
+def _resize_in_strips(src:str, tw:int, th:int, budget:int) -> Optional[Image.Image]:
+    """
+    Resize src without holding the full decode: decode only the rows feeding each band of
+    output rows (plus filter support margin) and resample that band with resize(box=...),
+    so bands join seamlessly. Returns None when the file cannot be decoded by bands.
+    """
+    # This drives Pillow's decoder through private state (im.tile layout, _size, _tile_size),
+    # checked against Pillow 12.3. Anything unexpected from another version means None, so
+    # the caller falls back to a full decode (which reports real file errors itself).
+    try: return _strips(src, tw, th, budget)
+    except Exception: return None
+
+def _strips(src:str, tw:int, th:int, budget:int) -> Optional[Image.Image]:
+    from PIL import Image
+    with Image.open(src) as im:
+        sw, sh, mode = im.width, im.height, im.mode
+        band_tiles = _band_tiles(im)
+    if band_tiles is None: return None
+    sy = sh / th; margin = int(3 * max(sy, 1.0)) + 2  # LANCZOS support is 3 source px per output px
+    row_bytes = sw * _pixel_bytes(mode)
+    band = max(1, int((budget // 2 // row_bytes - 2*margin) / sy))
+    out = Image.new(mode, (tw, th))
+    for oy0 in range(0, th, band):
+        oy1 = min(th, oy0 + band)
+        ty0, ty1, tiles = band_tiles(max(0, int(oy0*sy) - margin), min(sh, int(oy1*sy + 1) + margin))
+        with Image.open(src) as part:
+            part._size = (sw, ty1 - ty0); part.tile = tiles
+            if hasattr(part, "_tile_size"): part._tile_size = part._size  # TIFF allocates from this
+            part.load()
+            if part.size != (sw, ty1 - ty0): raise RuntimeError("band decode not honoured")
+            piece = part.resize((tw, oy1-oy0), resample=Image.LANCZOS if sy > 1 else Image.BICUBIC,
+                                box=(0, oy0*sy - ty0, sw, oy1*sy - ty0))
+        out.paste(piece, (0, oy0))
+    return out
+
+def _decode_variant(im:Image.Image, tw:int, th:int, fast_decode:bool):
+    # What the decoded pixels depend on besides the file: the reduction _reduce_on_decode asks for.
+    sw, sh = im.size
+    if not (fast_decode and tw<sw and th<sh): return None
+    if im.format == "JPEG": return _decoded_size(im, tw, th, True)
+    return (tw, th) if im.format == "JPEG2000" else None
+
+def _decoded(src:str, im:Image.Image, tw:int, th:int, opts:ResizeOptions, cache:Optional[DecodedCache]=None) -> Image.Image:
+    """
+    Decode im (opened from src, header only so far) the way a resize to (tw, th) wants it.
+    With cache, a hit returns the shared cached image (never modify or close it) and a
+    miss stores a copy, since im dies with its file.
+    """
+    key = None
+    if cache is not None:
+        fk = cache.file_key(src)
+        if fk:
+            key = fk + (_decode_variant(im, tw, th, opts.fast_decode),)
+            hit = cache.get(key)
+            if hit is not None: return hit
+    sw, sh = im.size
+    if opts.fast_decode and tw<sw and th<sh: _reduce_on_decode(im, tw, th)
+    im.load()
+    if key is not None:
+        nbytes = im.width * im.height * _pixel_bytes(im.mode)
+        if cache.fits(nbytes): cache.put(key, im.copy(), nbytes)
+    return im
+
+def _resample(im:Image.Image, tw:int, th:int, engine:str="pillow", box:Optional[tuple]=None) -> Image.Image:
+    # box: the region of im to resample (crop and resize in one pass)
+    from PIL import Image
+    sw, sh = im.size
+    if box is not None and tuple(box) == (0, 0, sw, sh): box = None
+    if (tw, th) == (sw, sh) and box is None: return im
+    if engine == "numpy" and box is None:
+        from .batch_resample import NUMPY_MODES, resize_batch
+        if im.mode in NUMPY_MODES: return resize_batch([im], (tw, th))[0]
+    bw, bh = (box[2] - box[0], box[3] - box[1]) if box else (sw, sh)
+    return im.resize((tw, th), resample=Image.LANCZOS if (tw<bw or th<bh) else Image.BICUBIC, box=box)
+
+def _decode_target(size:Tuple[int, int], target:Tuple[int, int], opts:ResizeOptions) -> Tuple[int, int]:
+    # the size the whole image has to be decoded for: the target, or the image scaled to cover/fit it
+    fit = fit_mode(opts)
+    return target if fit is None else scaled_size(size, target, fit)
+
+def _fitted(px:Image.Image, size:Tuple[int, int], tw:int, th:int, opts:ResizeOptions) -> Image.Image:
+    """Resample decoded pixels (of an image of size) to (tw, th): scaled, cropped or padded as opts.fit says."""
+    fit = fit_mode(opts)
+    if fit is None: return _resample(px, tw, th, opts.resampler)
+    if fit == "contain":
+        return pad(_resample(px, *scaled_size(size, (tw, th), fit), opts.resampler), (tw, th), opts.background)
+    box = center_box(px.size, (tw, th)) if fit == "cover" else smart_box(px, (tw, th))
+    return _resample(px, tw, th, opts.resampler, box)
+
+def _encode(im:Image.Image, pil_fmt:str, opts:ResizeOptions, info:Optional[dict]=None, upright:bool=False) -> bytes:
+    # info: the source's info dict, for the ICC/EXIF the options keep
+    im, info = to_output(im, pil_fmt, info or {}, opts.color, opts.background)
+    extra = save_params(info, pil_fmt, opts.keep_icc, opts.keep_exif, upright)
+    if opts.target_bytes:
+        return encode_to_size(im, pil_fmt, opts.target_bytes, opts.encoder_profile, opts.jpg_quality, extra)
+    return encode(im, pil_fmt, opts.encoder_profile, opts.jpg_quality if pil_fmt == "JPEG" else None, extra)
+
+def _lossless_ok(im:Image.Image, pil_fmt:str, target:Tuple[int, int], opts:ResizeOptions) -> bool:
+    # JPEG -> JPEG at the stored size: the pixels need no work, only metadata (and orientation)
+    return (opts.lossless and not opts.target_bytes and im.format == "JPEG" and pil_fmt == "JPEG"
+            and target == im.size and not converts(im, opts.color))
+
+def _lossless_jpeg(src:str, o:int, opts:ResizeOptions) -> Optional[bytes]:
+    """The source JPEG data with metadata stripped, losslessly turned upright; None if that cannot be done."""
+    data = read_source(src)
+    if o != 1:
+        data = jpegtran_orient(data, o)
+        if data is None: return None
+        data = reset_jpeg_orientation(data)
+    return strip_jpeg_metadata(data, opts.keep_icc, opts.keep_exif)
+
+def _write(dst:str, data:bytes, fsync:bool=False):
+    write_atomic(dst, data, fsync)
+
+def _lap(marks:Optional[list], stage:str):
+    if marks is not None: marks.append((stage, time.perf_counter()))
+
+def _durations(t0:float, marks:list) -> dict:
+    out = {}
+    for stage, t in marks: out[stage] = t - t0; t0 = t
+    return out
+
+def _total(inputs:Iterable[str], total:int|None) -> int:
+    if total is not None: return total
+    return len(inputs) if isinstance(inputs, Sized) else 0
+
+def _plan_dst(src:str, names:NameAllocator, opts:ResizeOptions, suffix:Optional[str]=None, subdir:str="") -> str:
+    base, in_ext = os.path.splitext(os.path.basename(src))
+    if subdir: base = f"{subdir}/{base}"
+    out_ext = in_ext.lstrip(".").lower() if opts.format_choice=="keep" else opts.format_choice
+    if suffix is None: suffix = "_resized" if opts.append_suffix else ""
+    # without a suffix the counter has always meant "overwrite in place"
+    strategy = "overwrite" if (opts.naming == "counter" and not opts.append_suffix) else opts.naming
+    return names.allocate(f"{base}{suffix}", f".{out_ext}", strategy, os.path.abspath(src))
+
+def _pil_format(dst:str) -> str:
+    out_ext = os.path.splitext(dst)[1].lstrip(".")
+    pil_fmt = EXT_TO_PIL.get(out_ext)
+    if not pil_fmt: raise ValueError(f"Unknown output format .{out_ext}")
+    return pil_fmt
+
+def _resize_one(src:str, dst:str, opts:ResizeOptions, digest:bool=False, timed:bool=False,
+                budget:Optional[int]=None, defer:bool=False, fsync:bool=False,
+                cache:Optional[DecodedCache]=None) -> Union[ResizeResult, Tuple[ResizeResult, bytes]]:
+    # Runs inside pool workers: must stay a picklable top-level function.
+    # With defer the encoded bytes are returned with the result for the caller to write.
+    # cache only ever arrives through serial/thread execution.
+    from PIL import Image
+    t0 = time.perf_counter(); marks = [] if timed else None
+    try:
+        pil_fmt = _pil_format(dst)
+        src_digest = None
+        if digest: src_digest = source_digest(src); _lap(marks, "hash")
+        with Image.open(open_source(src)) as im:
+            o = orientation(im) if opts.auto_orient else 1
+            (sw, sh), stored = oriented(im.size, o), im.size
+            # sizes are worked out upright; the pixels are resampled as stored and turned after
+            tw, th = calc_target_size(sw, sh, opts)
+            rw, rh = oriented((tw, th), o)
+            data = _lossless_jpeg(src, o, opts) if _lossless_ok(im, pil_fmt, (rw, rh), opts) else None
+            if data is not None: _lap(marks, "encode")
+            else:
+                strips = None
+                if (budget and not isinstance(src, ArchiveMember) and fit_mode(opts) is None
+                        and (stored[0]*stored[1] + rw*stored[1]) * _pixel_bytes(im.mode) > budget
+                        and _decoded_size(im, rw, rh, opts.fast_decode) == stored):
+                    strips = _resize_in_strips(src, rw, rh, budget)
+                if strips is not None:
+                    px = strips; _lap(marks, "resample")
+                else:
+                    px = _decoded(src, im, *_decode_target(stored, (rw, rh), opts), opts, cache); _lap(marks, "decode")
+                    px = _fitted(px, stored, rw, rh, opts); _lap(marks, "resample")
+                data = _encode(apply_orientation(px, o), pil_fmt, opts, im.info, o != 1); _lap(marks, "encode")
+        if not defer: _write(dst, data, fsync); _lap(marks, "write")
+        res = ResizeResult(src, dst, True, None, (sw,sh), (tw,th), src_digest=src_digest, elapsed=time.perf_counter()-t0)
+        if timed: res.timings, res.in_bytes, res.out_bytes = _durations(t0, marks), source_size(src), len(data)
+        return (res, data) if defer else res
+    except Exception as e:
+        return ResizeResult(src, None, False, str(e), elapsed=time.perf_counter()-t0,
+                            timings=_durations(t0, marks) if timed else None)
+
+def _resize_chunk(chunk:Sequence[Tuple[str, str]], opts:ResizeOptions, digest:bool=False, timed:bool=False,
+                  budget:Optional[int]=None, defer:bool=False, fsync:bool=False,
+                  cache:Optional[DecodedCache]=None) -> list:
+    """
+    numpy resampler: decode a chunk of (src, dst) pairs, resample every group sharing
+    decoded size, mode and target as one stack, then encode and write file by file.
+    Files the stack cannot take (other modes, no-op sizes, strip decoding) go through
+    _resize_one.
+    """
+    from PIL import Image
+    from .batch_resample import NUMPY_MODES, resize_batch
+    out: List[Optional[ResizeResult]] = [None]*len(chunk)
+    groups: dict = {}  # (decoded size, mode, target) -> [(k, pil_fmt, decoded, header, in_size, digest, timings)]
+    opened: List[Image.Image] = []
+
+    def fail(k, e, tm):
+        out[k] = ResizeResult(chunk[k][0], None, False, str(e), elapsed=sum(tm.values()), timings=tm if timed else None)
+
+    try:
+        for k, (src, dst) in enumerate(chunk):
+            t = time.perf_counter(); tm = {}
+            try:
+                pil_fmt = _pil_format(dst)
+                im = Image.open(open_source(src)); opened.append(im)
+                sw, sh = im.size; tw, th = calc_target_size(sw, sh, opts)
+                if (im.mode not in NUMPY_MODES or (tw, th) == (sw, sh) or fit_mode(opts) is not None
+                        or (opts.auto_orient and orientation(im) != 1)
+                        or (budget and (sw*sh + tw*sh) * _pixel_bytes(im.mode) > budget)):
+                    im.close(); out[k] = _resize_one(src, dst, opts, digest, timed, budget, defer, fsync, cache); continue
+                src_digest = None
+                if digest:
+                    src_digest = source_digest(src); tm["hash"] = time.perf_counter() - t; t = time.perf_counter()
+                px = _decoded(src, im, tw, th, opts, cache); tm["decode"] = time.perf_counter() - t
+                groups.setdefault((px.size, px.mode, (tw, th)), []).append((k, pil_fmt, px, im, (sw, sh), src_digest, tm))
+            except Exception as e:
+                tm.setdefault("decode", time.perf_counter() - t); fail(k, e, tm)
+
+        for (_, _, target), members in groups.items():
+            t = time.perf_counter()
+            try: resized = resize_batch([m[2] for m in members], target)
+            except Exception as e:
+                for k, *_, tm in members: fail(k, e, tm)
+                continue
+            share = (time.perf_counter() - t) / len(members)
+            for (k, pil_fmt, _, header, in_size, src_digest, tm), small in zip(members, resized):
+                src, dst = chunk[k]; tm["resample"] = share
+                try:
+                    t = time.perf_counter(); data = _encode(small, pil_fmt, opts, header.info); tm["encode"] = time.perf_counter() - t
+                    if not defer: t = time.perf_counter(); _write(dst, data, fsync); tm["write"] = time.perf_counter() - t
+                    res = ResizeResult(src, dst, True, None, in_size, target, src_digest=src_digest, elapsed=sum(tm.values()))
+                    if timed: res.timings, res.in_bytes, res.out_bytes = tm, source_size(src), len(data)
+                    out[k] = (res, data) if defer else res
+                except Exception as e: fail(k, e, tm)
+                header.close()
+    finally:
+        for im in opened: im.close()
+    return out
+
+def _chunked(jobs:Iterable, size:int) -> Iterator:
+    # Pack consecutive resize jobs into (pairs, opts, ...) chunk jobs;
+    # Ready entries flush the current chunk so the output order is kept.
+    pairs: list = []; rest: Tuple = ()
+    for job in jobs:
+        if isinstance(job, Ready):
+            if pairs: yield (pairs,) + rest; pairs = []
+            yield job; continue
+        pairs.append(job[:2]); rest = job[2:]
+        if len(pairs) >= size: yield (pairs,) + rest; pairs = []
+    if pairs: yield (pairs,) + rest
+
+def _unchunked(results:Iterable) -> Iterator:
+    for job, res, err in results:
+        if isinstance(job[0], list):
+            for k, pair in enumerate(job[0]): yield pair, (None if err else res[k]), err
+        else: yield job, res, err
+
+def _names_first(jobs:Iterable, journal:Journal, block:int=32) -> Iterator:
+    # Plan a few jobs, commit their output names to the journal, then let them run:
+    # an output can never exist under a name the journal has not recorded.
+    buf: list = []
+    for job in jobs:
+        buf.append(job)
+        if len(buf) >= block: journal.commit(); yield from buf; buf = []
+    journal.commit(); yield from buf
+
+def _weigh(job:Tuple) -> int:
+    if isinstance(job[0], list): return sum(_weigh((src, dst, job[1])) for src, dst in job[0])
+    try: return estimate_memory(job[0], job[2])
+    except Exception: return 0  # unreadable: let the worker report the error
 
 def resize_many(inputs: Iterable[str], out_dir: str, opts:ResizeOptions,
-                progress:ProgressCb|None=None, log:LogCb|None=None) -> Iterator[ResizeResult]:
+                progress:ProgressCb|None=None, log:LogCb|None=None,
+                workers:int=1, executor:str="process", ordered:bool=True,
+                max_in_flight:int|None=None, incremental:bool=False,
+                total:int|None=None, metrics:MetricsHook|None=None,
+                memory_budget:int|None=None, chunk_size:int=16,
+                pool:WorkerPool|None=None, io_threads:int=4, fsync:str="never",
+                cache:DecodedCache|None=None, dedup:str|None=None,
+                prefetch:Prefetcher|None=None, journal:bool|Journal=False) -> Iterator[ResizeResult]:
+    """
+    Resize every input into out_dir. workers=1 runs inline; workers>1 (or 0 for one per CPU)
+    spreads files over a process or thread pool. Results are yielded in input order, or as
+    they finish with ordered=False. Callbacks always run in the caller's thread.
+    With incremental=True a manifest in out_dir lets re-runs skip up-to-date outputs
+    (status "skipped") and rebuild stale ones in place.
+    inputs are consumed lazily; total is what progress reports as the batch size
+    (len(inputs) when available, else 0 for unknown).
+    metrics switches on per-stage timings/byte counts on each result and is called for
+    every stage (see core.metrics.BatchStats for p50/p95 summaries).
+    memory_budget (bytes) admits work only while the header-estimated decode size of the
+    files in flight fits; images bigger than the budget run alone, strip by strip when the
+    format allows.
+    opts.resampler="numpy" sends files to workers chunk_size at a time and resamples
+    same-size images in each chunk as one NumPy stack (core.batch_resample).
+    pool reuses a long-lived WorkerPool instead of starting one for this batch.
+    Outputs are written to a temp file and renamed into place. With io_threads > 0 workers
+    hand back encoded bytes and an OutputWriter thread pool does the writes; fsync is
+    "never", "file" or "batch" (one sync pass when the batch ends).
+    inputs may include core.archive.ArchiveMember entries (decoded from memory). An out_dir
+    ending in .zip/.tar/.tar.gz/... is written as that archive instead of a folder, keeping
+    the entry folders of archive inputs; incremental needs a folder (and always rebuilds
+    archive members, which the manifest cannot stat).
+    cache (a DecodedCache) reuses decoded images across batches; it is only used when the
+    work stays in this process (workers=1 or executor="thread").
+    dedup ("hardlink", "reflink" or "copy") resizes inputs with identical content once:
+    the inputs are listed up front and hashed (same-size files only), and each duplicate's
+    output is made from the first one's (ResizeResult.dedup_of names it). Links fall back
+    to copies where the filesystem cannot make them; archives get the bytes again.
+    prefetch (a Prefetcher) reads upcoming sources into memory on I/O threads, so workers
+    decode from buffers instead of waiting on storage; see its stats() for the hit rate.
+    journal=True records the options and the whole input list in out_dir before starting,
+    then each file's output name and outcome as the batch goes (core.journal), so resume()
+    can finish an interrupted batch; a Journal instance continues that journal instead of
+    taking inputs (and is closed when the batch ends).
+    """
+    if opts.resampler not in RESAMPLERS:
+        raise ValueError(f"Unknown resampler '{opts.resampler}' (expected one of {', '.join(RESAMPLERS)})")
+    if opts.resampler == "numpy":
+        from .batch_resample import HAVE_NUMPY
+        if not HAVE_NUMPY: raise RuntimeError("The numpy resampler needs NumPy (pip install numpy)")
+    if dedup is not None and dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode '{dedup}' (expected one of {', '.join(DEDUP_MODES)})")
+    to_archive = is_archive(out_dir)
+    if to_archive and incremental: raise ValueError("Incremental runs need an output folder, not an archive")
+    if to_archive and journal: raise ValueError("A journal needs an output folder, not an archive")
+    if not to_archive: os.makedirs(out_dir, exist_ok=True)
+    jr: Optional[Journal] = None
+    meta: deque = deque()  # (seq, output name planned earlier) of each journal entry, in input order
+    if journal:
+        jr = journal if isinstance(journal, Journal) else Journal.create(out_dir, inputs, opts)
+        total = jr.counts()[0]
+        def journaled() -> Iterator[str]:
+            for seq, src, dst in jr.pending(): meta.append((seq, dst)); yield src
+        inputs = journaled()
+    dups: Dict[int, Tuple[int, str]] = {}
+    if dedup:
+        inputs = list(inputs); dups = find_duplicates(inputs)
+    # canonical source -> duplicates still to serve from its output
+    owed = Counter(inputs[c] for c, _ in dups.values())
+    total = _total(inputs, total)
+    names = NameAllocator("", reserve=False) if to_archive else NameAllocator(out_dir)  # archive: names live in memory
+    if not to_archive and not isinstance(inputs, Sized):
+        # a lazy scan of out_dir itself would meet the outputs written so far
+        inputs = (src for src in inputs if not names.issued(src))
+    manifest = Manifest(out_dir) if incremental else None
+    fp = options_fingerprint(opts) if incremental else ""
+    if manifest:
+        # recorded outputs belong to their sources even when deleted since: never reuse their names
+        for dst in manifest.outputs(fp): names.claim(dst)
+    timed = metrics is not None
+    scope = metrics if hasattr(metrics, "__enter__") else contextlib.nullcontext()
+    writer = ArchiveWriter(out_dir) if to_archive else OutputWriter(io_threads, fsync)
+    defer = to_archive or io_threads > 0
+    in_process = (pool.kind if pool else executor) == "thread" or (pool.workers if pool else resolve_workers(workers)) == 1
+    tail = (opts, incremental, timed, memory_budget, defer, fsync == "file", cache if in_process else None)
+
+    live: dict = {}  # id(src) -> (src, journal seq) until its outcome is recorded
+    unwritten: set = set()  # names reserved here whose job has not finished yet
+    def plan(k:int, src:str):
+        prev_dst = planned = None
+        if jr:
+            seq, planned = meta.popleft(); live[id(src)] = (src, seq)
+            if planned: names.claim(planned)  # interrupted last time: rebuild under the same name
+        if manifest:
+            try: skipped, prev_dst = manifest.check(src, fp)
+            except OSError: skipped, prev_dst = None, None
+            if skipped: names.claim(skipped.dst_path); return Ready((src,), skipped)
+            if prev_dst: names.claim(prev_dst)
+        subdir = os.path.dirname(src.entry) if to_archive and isinstance(src, ArchiveMember) else ""
+        try: dst = planned or prev_dst or _plan_dst(src, names, opts, subdir=subdir)
+        except (OSError, ValueError) as e: return Ready((src,), ResizeResult(src, None, False, str(e)))
+        if dst is not planned and dst is not prev_dst: unwritten.add(dst)
+        if jr and not planned: jr.planned(seq, dst)
+        if k in dups: return Ready((src, dst, inputs[dups[k][0]], dups[k][1]), _DUPLICATE)
+        return (src, dst) + tail
+
+    served: dict = {}  # canonical source -> its finished result
+    held: dict = {}  # canonical source -> encoded bytes, for duplicates going into an archive
+    def serve(job:Tuple) -> Tuple[ResizeResult, Optional[Future]]:
+        src, dst, canon, digest = job; first = served[canon]
+        owed[canon] -= 1
+        data = held.pop(canon, None) if owed[canon] == 0 else held.get(canon)
+        if not first.ok:
+            return ResizeResult(src, None, False, f"duplicate of {canon}, which failed: {first.error}", dedup_of=canon), None
+        res = ResizeResult(src, dst, True, None, first.in_size, first.out_size, src_digest=digest, dedup_of=canon)
+        if timed: res.timings, res.in_bytes, res.out_bytes = {}, first.in_bytes, first.out_bytes
+        if to_archive: return res, writer.submit(dst, data)
+        t = time.perf_counter()
+        try: copy_atomic(first.dst_path, dst, dedup, fsync == "file")
+        except OSError as e: return ResizeResult(src, None, False, str(e), first.in_size, dedup_of=canon), None
+        res.elapsed = time.perf_counter() - t
+        if timed: res.timings["write"] = res.elapsed
+        return res, None
+
+    done = 0
+    def finish(job:Tuple, res:ResizeResult, write:Optional[Future]) -> ResizeResult:
+        nonlocal done
+        src = job[0]
+        if len(job) > 1: unwritten.discard(job[1])
+        if prefetch is not None: prefetch.release(src)
+        if write is not None:
+            try:
+                secs = write.result()
+                res.elapsed = (res.elapsed or 0) + secs
+                if res.timings is not None: res.timings["write"] = secs
+            except Exception as e:
+                res = ResizeResult(src, None, False, str(e), res.in_size, elapsed=res.elapsed, timings=res.timings)
+        if not res.ok:
+            if len(job) > 1: names.release(job[1])
+            if log: log(f"[Error] {os.path.basename(src)} -> {res.error}")
+        elif res.status == "ok": writer.written(res.dst_path)
+        if manifest and res.status == "ok":
+            try: manifest.record(res, fp)
+            except OSError: pass
+        if jr and id(src) in live: jr.finished(live.pop(id(src))[1], res)
+        if metrics and res.timings:
+            for stage, secs in res.timings.items(): metrics(stage, secs, res)
+        done += 1
+        return res
+
+    parked: dict = {}  # canonical source -> duplicates that came out before it was finished
+    def drain(force:bool=False) -> Iterator[ResizeResult]:
+        # results leave the window in order once written; a duplicate is served when it
+        # leaves, or right after its canonical if that finishes later (unordered runs)
+        while window and (force or len(window) > limit or window[0][2] is None or window[0][2].done()):
+            job, res, write = window.popleft()
+            if res is _DUPLICATE:
+                if job[2] not in served: parked.setdefault(job[2], []).append(job); continue
+                res, write = serve(job)
+            res = finish(job, res, write)
+            yield res
+            if progress: progress(done, total)
+            if owed.get(job[0]) and res.dedup_of is None and job[0] not in served:
+                served[job[0]] = res
+                for dup in parked.pop(job[0], ()):
+                    yield finish(dup, *serve(dup))
+                    if progress: progress(done, total)
+
+    window: deque = deque(); complete = False
+    sources = prefetch.iter(inputs) if prefetch is not None else inputs
+    try:
+        with scope, writer:
+            jobs = (plan(k, src) for k, src in enumerate(sources))
+            if jr: jobs = _names_first(jobs, jr)
+            fn = _resize_one
+            if opts.resampler == "numpy": fn, jobs = _resize_chunk, _chunked(jobs, max(1, chunk_size))
+            results = run_bounded(fn, jobs, workers, executor, max_in_flight, ordered,
+                                  weigh=_weigh if memory_budget else None, budget=memory_budget, pool=pool)
+            if fn is _resize_chunk: results = _unchunked(results)
+            # results wait here (in order) for their write; the window bounds the bytes held
+            limit = writer.threads * 4
+            for job, res, err in results:
+                write = None
+                if err is not None: res = ResizeResult(job[0], None, False, str(err) or type(err).__name__)
+                elif isinstance(res, tuple):
+                    res, data = res; write = writer.submit(job[1], data)
+                    if to_archive and owed.get(job[0]): held[job[0]] = data
+                window.append((job, res, write))
+                yield from drain()
+            yield from drain(force=True)
+        complete = True
+    finally:
+        if manifest: manifest.close()
+        if jr: jr.close(complete)
+        # an abandoned batch leaves no empty placeholders, except names the journal recorded for resume()
+        else:
+            for dst in unwritten: names.release(dst)
+        if sources is not inputs: sources.close()  # a batch abandoned midway lets go of its read-ahead
+
+def resume(out_dir:str, **kw) -> Iterator[ResizeResult]:
+    """
+    Continue the journaled batch in out_dir (resize_many(..., journal=True)) where it
+    stopped: inputs without a recorded outcome run with the recorded options, and files
+    that were in flight are rebuilt under the names they had. kw as for resize_many.
+    """
+    if not os.path.isfile(os.path.join(out_dir, JOURNAL_NAME)): raise FileNotFoundError(f"No batch journal in {out_dir}")
+    j = Journal(out_dir)
+    try: opts = j.options()
+    except Exception: j.close(); raise
+    return resize_many((), out_dir, opts, journal=j, **kw)
+
+def _warm_one(src:str, opts:ResizeOptions, cache:DecodedCache) -> int:
+    # 1 = decoded into the cache, 0 = nothing to do, -1 = the cache is full
+    from PIL import Image
+    key = cache.file_key(src)
+    if key is None: return 0
+    with Image.open(src) as im:
+        o = orientation(im) if opts.auto_orient else 1
+        tw, th = _decode_target(im.size, oriented(calc_target_size(*oriented(im.size, o), opts), o), opts)
+        dw, dh = _decoded_size(im, tw, th, opts.fast_decode)
+        if not cache.has_room(dw * dh * _pixel_bytes(im.mode)): return -1
+        _decoded(src, im, tw, th, opts, cache)
+    return 1
+
+def warm_cache(inputs:Iterable[str], opts:ResizeOptions, cache:DecodedCache, workers:int=0,
+               stop:Callable[[], bool]|None=None) -> int:
+    """
+    Decode inputs into cache the way a later resize_many(..., opts, cache=cache) looks them
+    up, on a thread pool, until the cache would have to evict. Returns the images added.
+    """
+    added = 0
+    for _, res, err in run_bounded(_warm_one, ((src, opts, cache) for src in inputs), workers, "thread"):
+        if err is None and res == -1: break
+        added += err is None and res == 1
+        if stop and stop(): break
+    return added
+
+def _rendition_name(opts:ResizeOptions) -> str:
+    size = f"{opts.percent:g}pct" if opts.mode == "percent" else f"{opts.width_px or ''}x{opts.height_px or ''}"
+    if fit_mode(opts): size = f"{size}_{opts.fit}"
+    return size if opts.format_choice == "keep" else f"{size}_{opts.format_choice}"
+
+def _render_set(src:str, plan:Sequence[Tuple[str, ResizeOptions]]) -> RenditionResult:
+    # One decode per source; renditions are built largest first, each resampled from the
+    # smallest already-built level that still covers it (uniformly scaled levels only).
+    from PIL import Image
+    try:
+        with Image.open(open_source(src)) as im:
+            ori = orientation(im) if all(o.auto_orient for _, o in plan) else 1
+            sw, sh = im.size; in_size = oriented(im.size, ori)
+            # levels are built in stored orientation; each is turned upright only to encode
+            targets = [oriented(calc_target_size(*in_size, o), ori) for _, o in plan]
+            need = [_decode_target((sw, sh), t, o) for t, (_, o) in zip(targets, plan)]
+            mw, mh = max(t[0] for t in need), max(t[1] for t in need)
+            if all(o.fast_decode for _, o in plan) and mw<sw and mh<sh:
+                _reduce_on_decode(im, mw, mh)
+            im.load()
+            base = im
+            out: List[Optional[ResizeResult]] = [None]*len(plan)
+            levels: List[Image.Image] = []
+            for i in sorted(range(len(plan)), key=lambda k: targets[k][0]*targets[k][1], reverse=True):
+                (dst, opts), (tw, th) = plan[i], targets[i]
+                try:
+                    pil_fmt = _pil_format(dst)
+                    # cropped/padded renditions are made from the decode and never serve as levels
+                    if fit_mode(opts) is not None: level = _fitted(base, (sw, sh), tw, th, opts)
+                    else:
+                        src_level = next((lv for lv in reversed(levels) if lv.width>=tw and lv.height>=th), base)
+                        level = _resample(src_level, tw, th, opts.resampler)
+                        if abs(tw*sh - th*sw) <= max(sw, sh): levels.append(level)
+                    _write(dst, _encode(apply_orientation(level, ori), pil_fmt, opts, im.info, ori != 1))
+                    out[i] = ResizeResult(src, dst, True, None, in_size, oriented((tw, th), ori))
+                except Exception as e:
+                    out[i] = ResizeResult(src, None, False, str(e), in_size)
+            return RenditionResult(src, out)
+    except Exception as e:
+        return RenditionResult(src, [ResizeResult(src, None, False, str(e)) for _ in plan])
+
+def resize_renditions(inputs: Iterable[str], out_dir: str, renditions: Sequence[Union[Rendition, ResizeOptions]],
+                      progress:ProgressCb|None=None, log:LogCb|None=None,
+                      workers:int=1, executor:str="process", ordered:bool=True,
+                      max_in_flight:int|None=None, total:int|None=None) -> Iterator[RenditionResult]:
+    """
+    Produce several renditions per source from a single decode, written as
+    <name>_<rendition>.<ext>. Plain ResizeOptions get a name derived from their size/format.
+    Takes the same execution arguments as resize_many.
+    """
+    specs = [r if isinstance(r, Rendition) else Rendition(_rendition_name(r), r) for r in renditions]
+    if not specs: raise ValueError("At least one rendition is required")
     os.makedirs(out_dir, exist_ok=True)
-    files = list(inputs); total=len(files)
-    for i, src in enumerate(files, 1):
-        try:
-            with Image.open(src) as im:
-                sw, sh = im.size
-                tw, th = calc_target_size(sw, sh, opts)
-                resample = Image.LANCZOS if (tw<sw or th<sh) else Image.BICUBIC
-                if (tw, th) != (sw, sh): im = im.resize((tw, th), resample=resample)
-
-                base, in_ext = os.path.splitext(os.path.basename(src))
-                out_ext = in_ext.lstrip(".").lower() if opts.format_choice=="keep" else opts.format_choice
-                pil_fmt = EXT_TO_PIL.get(out_ext)
-                if not pil_fmt: raise ValueError(f"Unknown output format .{out_ext}")
-
-                name = f"{base}{'_resized' if opts.append_suffix else ''}.{out_ext}"
-                dst = os.path.join(out_dir, name)
-                if opts.append_suffix: dst = next_available(dst)
-
-                _save(im, dst, pil_fmt, opts.jpg_quality)
-
-            yield ResizeResult(src, dst, True, None, (sw,sh), (tw,th))
-        except Exception as e:
-            msg = f"[Error] {os.path.basename(src)} -> {e}"
-            if log: log(msg)
-            yield ResizeResult(src, None, False, str(e))
-        finally:
-            if progress: progress(i, total)
+    total = _total(inputs, total)
+    names = NameAllocator(out_dir)
+
+    def plan(src:str):
+        try: return (src, [(_plan_dst(src, names, r.opts, f"_{r.name}"), r.opts) for r in specs])
+        except (OSError, ValueError) as e: return Ready((src,), RenditionResult(src, [ResizeResult(src, None, False, str(e)) for _ in specs]))
+
+    jobs = (plan(src) for src in inputs)
+    for i, (job, res, err) in enumerate(run_bounded(_render_set, jobs, workers, executor, max_in_flight, ordered), 1):
+        src = job[0]
+        if err is not None: res = RenditionResult(src, [ResizeResult(src, None, False, str(err) or type(err).__name__) for _ in specs])
+        if len(job) > 1:
+            for (dst, _), r in zip(job[1], res.results):
+                if not r.ok: names.release(dst)
+        if log:
+            for e in dict.fromkeys(r.error for r in res.results if not r.ok):
+                log(f"[Error] {os.path.basename(src)} -> {e}")
+        yield res
+        if progress: progress(i, total)
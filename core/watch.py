@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .io_utils import SUPPORTED_EXTS, Globs, _dir_key, _match
+from .models import ResizeOptions, ResizeResult
+from .parallel import WorkerPool
+from .resize_service import LogCb, resize_many
+
+Sig = Tuple[int, int]  # (size, mtime_ns)
+RECENT_DIR_SECS = 2.0  # rescan directories touched this recently: mtime granularity can hide a change
+
+class FolderWatcher:
+    """
+    Polls a folder tree for new or changed images without walking everything each tick:
+    only directories whose mtime moved are listed again, and in those only names that are
+    new or now point at another inode (a file replaced by rename) are stat'ed, besides the
+    files not yet settled. A file is handed out once its size and mtime have been unchanged
+    for `settle` seconds, and again whenever a later listing sees it with a new signature.
+    In-place rewrites keep the inode and the directory mtime; full_rescan (seconds) stats
+    every file again to catch them.
+    skip_dirs (paths) are never listed, e.g. an output folder inside the watched one.
+    """
+    def __init__(self, folder: str, include: Globs=None, exclude: Globs=None, recursive: bool=True,
+                 settle: float=2.0, full_rescan: Optional[float]=None, skip_dirs: Globs=None):
+        self.folder = folder; self.include = include; self.exclude = exclude
+        self._skip = {_dir_key(d) for d in skip_dirs or ()}
+        self.recursive = recursive; self.settle = settle; self.full_rescan = full_rescan
+        self._dirs: Dict[str, int] = {}  # dir -> mtime_ns at its last listing
+        self._files: Dict[str, Dict[str, Sig]] = {}  # dir -> {name: signature last handed out}
+        self._inodes: Dict[str, Dict[str, int]] = {}  # dir -> {name: inode} of the images it last listed
+        self._pending: Dict[str, Tuple[Sig, float]] = {}  # path -> (signature, unchanged since)
+        self._last_full = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.folder).replace(os.sep, "/")
+
+    def _list(self, d: str, now: float, full: bool=False):
+        try: it = os.scandir(d)
+        except OSError: self._drop(d); return
+        seen, subdirs = set(), []
+        known = self._files.setdefault(d, {})
+        inodes = {} if full else self._inodes.get(d, {}); listed = self._inodes[d] = {}
+        with it:
+            for e in it:
+                try: same = e.name in inodes and inodes[e.name] == e.inode()  # no system call on POSIX
+                except OSError: same = False
+                if same:  # the same file as last time: filtered and stat'ed then
+                    seen.add(e.name); listed[e.name] = inodes[e.name]; continue
+                rel = self._rel(e.path)
+                if self.exclude and _match(rel, e.name, self.exclude): continue
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if self.recursive and _dir_key(e.path) not in self._skip: subdirs.append(e.path)
+                        continue
+                    if e.is_symlink() and e.is_dir(): continue  # symlinked folders are not followed
+                    if os.path.splitext(e.name)[1].lower() not in SUPPORTED_EXTS: continue
+                    if self.include and not _match(rel, e.name, self.include): continue
+                    st = e.stat(); listed[e.name] = e.inode()
+                except OSError: continue
+                seen.add(e.name); sig = (st.st_size, st.st_mtime_ns)
+                if known.get(e.name) != sig and e.path not in self._pending:
+                    # files last modified longer ago than settle are ready on first sight
+                    since = min(now, st.st_mtime_ns / 1e9)
+                    self._pending[e.path] = (sig, since)
+        for name in [n for n in known if n not in seen]:
+            del known[name]; self._pending.pop(os.path.join(d, name), None)
+        for sub in subdirs:
+            if sub not in self._dirs: self._scan_dir(sub, now)
+        for gone in [s for s in self._dirs if os.path.dirname(s) == d and s != d and s not in subdirs]:
+            self._drop(gone)
+
+    def _scan_dir(self, d: str, now: float):
+        try: self._dirs[d] = os.stat(d).st_mtime_ns
+        except OSError: self._drop(d); return
+        self._list(d, now)
+
+    def _drop(self, d: str):
+        prefix = d + os.sep
+        for k in [k for k in self._dirs if k == d or k.startswith(prefix)]:
+            del self._dirs[k]; self._files.pop(k, None); self._inodes.pop(k, None)
+        for p in [p for p in self._pending if p.startswith(prefix)]: del self._pending[p]
+
+    def poll(self, now: Optional[float]=None) -> List[str]:
+        """One tick: pick up directory changes, then return the files that have settled."""
+        now = time.time() if now is None else now
+        full = not self._dirs or (self.full_rescan is not None and now - self._last_full >= self.full_rescan)
+        if full: self._last_full = now
+        if not self._dirs: self._scan_dir(self.folder, now)
+        else:
+            for d, mtime in list(self._dirs.items()):
+                if d not in self._dirs: continue  # dropped with its parent this tick
+                try: cur = os.stat(d).st_mtime_ns
+                except OSError: self._drop(d); continue
+                if full or cur != mtime or now - cur / 1e9 < RECENT_DIR_SECS:
+                    self._dirs[d] = cur; self._list(d, now, full)
+
+        ready: List[str] = []
+        for path, (sig, since) in list(self._pending.items()):
+            try: st = os.stat(path)
+            except OSError: del self._pending[path]; continue
+            cur = (st.st_size, st.st_mtime_ns)
+            if cur != sig: self._pending[path] = (cur, min(now, st.st_mtime_ns / 1e9))
+            elif now - since >= self.settle:
+                del self._pending[path]
+                d, name = os.path.split(path)
+                self._files.setdefault(d, {})[name] = sig
+                ready.append(path)
+        return ready
+
+def watch(folder: str, out_dir: str, opts: ResizeOptions, interval: float=2.0, settle: float=2.0,
+          include: Globs=None, exclude: Globs=None, recursive: bool=True, full_rescan: Optional[float]=None,
+          workers: int=0, executor: str="process", log: LogCb|None=None,
+          on_result: Optional[Callable[[ResizeResult], None]]=None,
+          stop: Optional[threading.Event]=None, **resize_kw) -> int:
+    """
+    Keep resizing new/changed images from folder into out_dir until stop is set. Work runs
+    incrementally through the out_dir manifest (so a restart only redoes what changed)
+    on one worker pool that lives as long as the watch. Returns the number of results.
+    out_dir may be inside folder (it is not watched) but not folder itself: every output
+    would come back as a new input.
+    """
+    if _dir_key(out_dir) == _dir_key(folder):
+        raise ValueError("The output folder of a watch cannot be the watched folder")
+    stop = stop or threading.Event()
+    watcher = FolderWatcher(folder, include, exclude, recursive, settle, full_rescan, skip_dirs=[out_dir])
+    n = 0
+    with WorkerPool(workers, executor) as pool:
+        while not stop.is_set():
+            ready = watcher.poll()
+            if ready:
+                if log: log(f"[Watch] {len(ready)} file(s) ready")
+                for res in resize_many(ready, out_dir, opts, log=log, incremental=True, pool=pool, **resize_kw):
+                    n += 1
+                    if on_result: on_result(res)
+            stop.wait(interval)
+    return n
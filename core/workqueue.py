@@ -0,0 +1,199 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import asdict
+from typing import Iterable, Iterator, Optional
+
+from .archive import ArchiveMember
+from .journal import Journal
+from .models import ResizeOptions, ResizeResult
+from .parallel import resolve_workers
+from .resize_service import LogCb, resize_many
+
+QUEUE_NAME = ".resize_queue.sqlite"
+
+class LeaseLost(RuntimeError):
+    """The chunk's lease ran out and another worker took it over."""
+
+def _absolute(src: str) -> str:
+    # queued paths must mean the same file to every worker, whatever its working directory
+    if isinstance(src, ArchiveMember):
+        if src.data is not None:
+            raise ValueError(f"{src.archive}: members of a compressed TAR can only be read by streaming the whole "
+                             "archive, once per chunk; extract it, or use a ZIP or an uncompressed TAR")
+        return ArchiveMember(os.path.abspath(src.archive), src.entry, src.offset, src.size, src.data)
+    return os.path.abspath(src)
+
+class WorkQueue:
+    """
+    A batch split into chunks in one sqlite file, from which worker processes on this host
+    or on others sharing the filesystem claim work. A claimed chunk is leased for `lease`
+    seconds and the lease is renewed as its files finish; a worker that dies stops renewing,
+    and once the lease has run out the next free worker takes the chunk over, rebuilding
+    its interrupted files under the names recorded for them (the queue is a core.journal
+    Journal with chunks). A chunk that has been taken max_attempts times is given up and
+    its remaining files are reported as errors. Every file's ResizeResult is kept in the
+    queue for results()/report().
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)  # explicit transactions
+        j = Journal("", path=path, wal=False)
+        try:
+            self.out_dir = j.info("out_dir"); self._opts = j.options()
+            self.lease = float(j.info("lease")); self.max_attempts = int(j.info("max_attempts"))
+        finally: j.close()
+
+    @classmethod
+    def create(cls, path: str, inputs: Iterable[str], opts: ResizeOptions, out_dir: str, chunk_size: int=64,
+               lease: float=120.0, max_attempts: int=3) -> "WorkQueue":
+        """Queue inputs (replacing any batch already in path) for resizing into out_dir."""
+        out_dir = os.path.abspath(out_dir); os.makedirs(out_dir, exist_ok=True)
+        j = Journal(out_dir, path=path, wal=False)
+        try:
+            j.start((_absolute(src) for src in inputs), opts, max(1, chunk_size),
+                    out_dir=out_dir, lease=str(lease), max_attempts=str(max_attempts))
+            with j.conn:
+                j.conn.execute("DROP TABLE IF EXISTS chunks")
+                j.conn.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, state TEXT, owner TEXT, "
+                               "lease_until REAL, attempts INTEGER)")
+                j.conn.execute("INSERT INTO chunks SELECT DISTINCT chunk, 'pending', NULL, 0, 0 FROM files")
+        finally: j.close()
+        return cls(path)
+
+    def options(self) -> ResizeOptions:
+        return self._opts
+
+    @contextlib.contextmanager
+    def _tx(self):
+        self.conn.execute("BEGIN IMMEDIATE")  # take the write lock before reading what to claim
+        try: yield
+        except BaseException: self.conn.execute("ROLLBACK"); raise
+        self.conn.execute("COMMIT")
+
+    def claim(self, owner: str) -> Optional[int]:
+        """Lease the next pending (or expired) chunk to owner; None when there is none right now."""
+        while True:
+            with self._tx():
+                row = self.conn.execute("SELECT id, attempts FROM chunks WHERE state='pending' OR "
+                                        "(state='leased' AND lease_until < ?) ORDER BY id LIMIT 1",
+                                        (time.time(),)).fetchone()
+                if row is None: return None
+                chunk, attempts = row
+                if attempts < self.max_attempts:
+                    self.conn.execute("UPDATE chunks SET state='leased', owner=?, lease_until=?, attempts=attempts+1 "
+                                      "WHERE id=?", (owner, time.time() + self.lease, chunk))
+                    return chunk
+                self._give_up(chunk, attempts)
+
+    def _give_up(self, chunk: int, attempts: int):
+        # runs inside claim()'s transaction
+        error = f"abandoned: its workers stopped responding {attempts} times"
+        rows = self.conn.execute("SELECT seq, src FROM files WHERE chunk=? AND status IS NULL", (chunk,)).fetchall()
+        self.conn.executemany("UPDATE files SET status='error', error=?, result=? WHERE seq=?",
+                              [(error, json.dumps(asdict(ResizeResult(src, None, False, error))), seq) for seq, src in rows])
+        self.conn.execute("UPDATE chunks SET state='failed' WHERE id=?", (chunk,))
+
+    def renew(self, chunk: int, owner: str) -> bool:
+        cur = self.conn.execute("UPDATE chunks SET lease_until=? WHERE id=? AND owner=? AND state='leased'",
+                                (time.time() + self.lease, chunk, owner))
+        return cur.rowcount == 1
+
+    def complete(self, chunk: int, owner: str):
+        self.conn.execute("UPDATE chunks SET state='done' WHERE id=? AND owner=?", (chunk, owner))
+
+    def remaining(self) -> int:
+        """Chunks not finished yet (pending or leased)."""
+        return self.conn.execute("SELECT COUNT(*) FROM chunks WHERE state IN ('pending', 'leased')").fetchone()[0]
+
+    def results(self) -> Iterator[ResizeResult]:
+        j = Journal("", path=self.path, wal=False)
+        try: yield from j.results()
+        finally: j.close()
+
+    def report(self) -> dict:
+        """Files by outcome ("pending" for those without one), chunks by state, and retries."""
+        files = dict(self.conn.execute("SELECT COALESCE(status, 'pending'), COUNT(*) FROM files GROUP BY 1"))
+        chunks = dict(self.conn.execute("SELECT state, COUNT(*) FROM chunks GROUP BY state"))
+        retried = self.conn.execute("SELECT COUNT(*) FROM chunks WHERE attempts > 1").fetchone()[0]
+        return {"files": files, "chunks": chunks, "retried_chunks": retried}
+
+    def close(self):
+        self.conn.close()
+
+class _ChunkJournal(Journal):
+    # The journal of one leased chunk; keeping the lease rides on its commits and outcomes.
+    def __init__(self, queue: WorkQueue, chunk: int, owner: str):
+        super().__init__(queue.out_dir, path=queue.path, chunk=chunk, wal=False)
+        self.queue, self.owner, self._closing = queue, owner, False
+        self._renew_at = time.time() + queue.lease / 4
+
+    def _keep_lease(self):
+        if self._closing or time.time() < self._renew_at: return
+        if not self.queue.renew(self.chunk, self.owner): raise LeaseLost(f"chunk {self.chunk} was taken over")
+        self._renew_at = time.time() + self.queue.lease / 4
+
+    def commit(self):
+        super().commit(); self._keep_lease()
+
+    def finished(self, seq: int, res: ResizeResult):
+        super().finished(seq, res); self._keep_lease()
+
+    def close(self, complete: bool=False):
+        self._closing = True
+        super().close(False)
+        if complete: self.queue.complete(self.chunk, self.owner)
+
+def run_worker(path: str, owner: Optional[str]=None, poll: Optional[float]=None, stop=None,
+               log: LogCb|None=None, **resize_kw) -> int:
+    """
+    Work on the queue at path until nothing is left: claim a chunk, resize it with
+    resize_many (resize_kw: workers, executor, io_threads, ...), repeat. While the rest is
+    leased to others it keeps polling, to take over from workers that die. stop (an Event)
+    ends it after the current chunk. Returns the number of results produced here.
+    """
+    q = WorkQueue(path); owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    poll = poll or min(5.0, q.lease / 4); n = 0
+    try:
+        while not (stop and stop.is_set()):
+            chunk = q.claim(owner)
+            if chunk is None:
+                if not q.remaining(): break
+                if stop: stop.wait(poll)
+                else: time.sleep(poll)
+                continue
+            if log: log(f"[Queue] {owner}: chunk {chunk}")
+            try:
+                for _ in resize_many((), q.out_dir, q.options(), log=log, journal=_ChunkJournal(q, chunk, owner),
+                                     **resize_kw): n += 1
+            except LeaseLost as e:
+                if log: log(f"[Queue] {owner}: {e}")
+    finally: q.close()
+    return n
+
+def run_local(path: str, processes: int=0, log: LogCb|None=None, interval: float=5.0, **resize_kw) -> dict:
+    """
+    Work on the queue at path with `processes` worker processes on this host (0 = one per
+    CPU), logging progress every interval seconds; returns the queue's report() once they
+    are all done. Workers on other hosts can join the same queue with run_worker.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=run_worker, args=(path,), kwargs=resize_kw, daemon=True)
+             for _ in range(resolve_workers(processes))]
+    for p in procs: p.start()
+    q = WorkQueue(path)
+    try:
+        while any(p.is_alive() for p in procs):
+            for p in procs: p.join(interval / len(procs))
+            if log:
+                files = q.report()["files"]
+                log(f"[Queue] {sum(files.values()) - files.get('pending', 0)}/{sum(files.values())} files done")
+        return q.report()
+    finally:
+        for p in procs:
+            if p.is_alive(): p.terminate()
+        q.close()
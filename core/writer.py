@@ -0,0 +1,116 @@
+import os
+import secrets
+import shutil
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+FSYNC_POLICIES = ("never", "file", "batch")
+FICLONE = 0x40049409  # Linux ioctl: share the source's extents (btrfs, XFS, ...)
+
+def _fsync_dir(d: str):
+    # Makes a rename durable on POSIX; directories cannot be opened for fsync on Windows.
+    if os.name != "posix": return
+    fd = os.open(d or ".", os.O_RDONLY)
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+def _tmp_path(dst: str) -> str:
+    d, name = os.path.split(dst)
+    return os.path.join(d, f".{name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+
+def write_atomic(dst: str, data: bytes, fsync: bool=False):
+    """
+    Write data to a temp file next to dst in one call, then rename it over dst, so readers
+    only ever see the old file or the complete new one. The temp file is created with the
+    process umask like a plain open() would.
+    """
+    d = os.path.dirname(dst); tmp = _tmp_path(dst)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as f:
+            view = memoryview(data)
+            while view: view = view[f.write(view):]
+            if fsync: os.fsync(f.fileno())
+        os.replace(tmp, dst)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    if fsync: _fsync_dir(d)
+
+def _reflink(src: str, dst: str):
+    import fcntl  # POSIX only; ImportError falls back to a copy
+    with open(src, "rb") as s, open(dst, "xb") as t: fcntl.ioctl(t.fileno(), FICLONE, s.fileno())
+
+def copy_atomic(src: str, dst: str, how: str="copy", fsync: bool=False) -> str:
+    """
+    Make dst the same file as the finished output src, renamed into place like
+    write_atomic: a hard link, a reflink (copy-on-write clone) or a plain copy. Links the
+    filesystem refuses fall back to a copy. Returns how dst was made.
+    """
+    d = os.path.dirname(dst); tmp = _tmp_path(dst); done = None
+    try:
+        if how == "hardlink":
+            try: os.link(src, tmp); done = how
+            except OSError: pass
+        elif how == "reflink":
+            try: _reflink(src, tmp); done = how
+            except (OSError, ImportError):
+                if os.path.exists(tmp): os.unlink(tmp)
+        if done is None: shutil.copyfile(src, tmp); done = "copy"
+        if fsync:
+            fd = os.open(tmp, os.O_RDONLY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+        os.replace(tmp, dst)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    if fsync: _fsync_dir(d)
+    return done
+
+def sync_paths(paths: List[str]):
+    """fsync already-written files, then each of their directories once."""
+    for p in paths:
+        fd = os.open(p, os.O_RDONLY)
+        try: os.fsync(fd)
+        finally: os.close(fd)
+    for d in dict.fromkeys(os.path.dirname(p) for p in paths): _fsync_dir(d)
+
+class OutputWriter:
+    """
+    Writes encoded outputs atomically on a small thread pool so encoding and disk latency
+    overlap. fsync: "never", "file" (each file and its rename) or "batch" (everything
+    written is synced once, on close()).
+    """
+    def __init__(self, threads: int=4, fsync: str="never"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}' (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.threads = max(1, threads); self.fsync = fsync
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._written: List[str] = []
+
+    def _write(self, dst: str, data: bytes) -> float:
+        t = time.perf_counter()
+        write_atomic(dst, data, self.fsync == "file")
+        return time.perf_counter() - t
+
+    def submit(self, dst: str, data: bytes) -> Future:
+        """Queue a write; the future gives the seconds it took."""
+        if self._pool is None: self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="writer")
+        return self._pool.submit(self._write, dst, data)
+
+    def written(self, dst: str):
+        """Note a finished output (written here or by a worker) for the batch fsync."""
+        if self.fsync == "batch": self._written.append(dst)
+
+    def close(self):
+        if self._pool is not None: self._pool.shutdown(wait=True); self._pool = None
+        if self._written:
+            paths, self._written = self._written, []
+            sync_paths([p for p in paths if os.path.exists(p)])
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()